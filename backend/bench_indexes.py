@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark the listing indexes: EXPLAIN QUERY PLAN and latency of the API's
+listing, scraper and cleanup queries without and with the composite/partial
+indexes declared in models_sqlite.py
+
+Usage: python bench_indexes.py [--coupons 500000] [--stores 5000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from models_sqlite import Base, Store, Coupon
+from pagination import encode_cursor, keyset_paginate
+from routers.coupons import COUPON_LIST_COLUMNS
+from routers.stores import STORE_LIST_COLUMNS
+
+NEW_INDEXES = [
+    index for table in (Store.__table__, Coupon.__table__)
+    for index in table.indexes if index.name.startswith(("ix_stores_active", "ix_coupons_active", "uq_coupons"))
+]
+REGIONS = {"america": ["US", "CA", "BR"], "europe": ["UK", "DE", "FR"], "asia": ["IN", "SG", "JP"]}
+STORE_TYPES = ["retail", "food_delivery", "grocery"]
+CATEGORIES = ["fashion", "electronics", "beauty", "home", "food", None]
+
+
+def build_dataset(path: str, store_count: int, coupon_count: int, seed: int = 42):
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    started = datetime.utcnow() - timedelta(days=365)
+
+    with engine.begin() as conn:
+        stores = []
+        for i in range(store_count):
+            region = rng.choice(list(REGIONS))
+            stores.append({
+                "name": f"Store {i}", "slug": f"store-{i}", "domain": f"store{i}.example.com",
+                "region": region, "country": rng.choice(REGIONS[region]),
+                "store_type": rng.choice(STORE_TYPES), "category": rng.choice(CATEGORIES),
+                "is_active": rng.random() < 0.9, "active_coupon_count": 0,
+                "created_at": started + timedelta(minutes=i),
+            })
+        conn.execute(insert(Store), stores)
+
+        batch = []
+        for n in range(coupon_count):
+            created_at = started + timedelta(seconds=n * 30)
+            batch.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "store_id": rng.randint(1, store_count),
+                "code": f"SAVE{n}",
+                "title": f"{rng.choice([10, 20, 30])}% off",
+                # Most historical coupons have been deactivated by cleanup
+                "is_active": rng.random() < 0.2,
+                "expires_at": created_at + timedelta(days=rng.randint(1, 90)),
+                "scraped_at": created_at,
+                "created_at": created_at,
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Coupon), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Coupon), batch)
+
+    return engine
+
+
+def listing_queries(db):
+    """The statements behind the hot endpoints and tasks, as (name, runnable) pairs"""
+    coupons = db.query(*COUPON_LIST_COLUMNS).select_from(Coupon).filter(Coupon.is_active == True).join(Store)
+    stores = db.query(*STORE_LIST_COLUMNS).filter(Store.is_active == True)
+    # A cursor halfway down the active coupons, whatever the dataset size
+    active = db.query(Coupon.id).filter(Coupon.is_active == True).count()
+    middle = db.query(Coupon.created_at, Coupon.id).filter(Coupon.is_active == True).order_by(
+        Coupon.created_at.desc(), Coupon.id.desc()
+    ).offset(active // 2).first()
+
+    def page(query, column, id_column, descending, cursor=None):
+        return lambda: keyset_paginate(query, column, id_column, 20, cursor=cursor, descending=descending)
+
+    queries = [("coupons: first page", page(coupons, Coupon.created_at, Coupon.id, True))]
+    if middle is not None:
+        queries.append(("coupons: cursor page", page(coupons, Coupon.created_at, Coupon.id, True, encode_cursor(*middle))))
+    return queries + [
+        ("coupons: region", page(coupons.filter(Store.region == "europe"), Coupon.created_at, Coupon.id, True)),
+        ("coupons: store", page(coupons.filter(Store.slug == "store-42"), Coupon.created_at, Coupon.id, True)),
+        ("stores: region+country", page(
+            stores.filter(Store.region == "asia", Store.country == "SG"), Store.created_at, Store.id, False
+        )),
+        ("stores: all filters", page(
+            stores.filter(Store.region == "europe", Store.country == "DE",
+                          Store.store_type == "retail", Store.category == "fashion"),
+            Store.created_at, Store.id, False
+        )),
+        ("scraper: code lookup", lambda: db.query(Coupon).filter(
+            Coupon.store_id == 42, Coupon.code == "SAVE4242"
+        ).first()),
+        ("cleanup: expired", lambda: db.query(Coupon.store_id).filter(
+            Coupon.expires_at < datetime.utcnow(), Coupon.is_active == True
+        ).count()),
+    ]
+
+
+def explain(db, run):
+    """EXPLAIN QUERY PLAN for every statement the callable executes"""
+    plans = []
+    connection = db.connection()
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("EXPLAIN"):
+            plans.append(cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall())
+
+    from sqlalchemy import event
+    event.listen(connection.engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(connection.engine, "before_cursor_execute", capture)
+    return [row[-1] for plan in plans for row in plan]
+
+
+def measure(run, repeat: int):
+    run()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def report(engine, repeat: int):
+    db = sessionmaker(bind=engine)()
+    results = {}
+    for name, run in listing_queries(db):
+        results[name] = (measure(run, repeat), explain(db, run))
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coupons", type=int, default=500_000)
+    parser.add_argument("--stores", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Building {args.stores:,} stores and {args.coupons:,} coupons...")
+        engine = build_dataset(os.path.join(tmp, "bench.db"), args.stores, args.coupons)
+
+        # Before: the single-column indexes only, as an existing database has them
+        with engine.begin() as conn:
+            for index in NEW_INDEXES:
+                conn.execute(text(f"DROP INDEX {index.name}"))
+            conn.execute(text("ANALYZE"))
+        before = report(engine, args.repeat)
+
+        with engine.begin() as conn:
+            for index in NEW_INDEXES:
+                index.create(bind=conn)
+            conn.execute(text("ANALYZE"))
+        after = report(engine, args.repeat)
+        engine.dispose()
+
+    print(f"\n{'query':<24} {'before':>10} {'after':>10} {'speedup':>8}")
+    for name, (before_time, _) in before.items():
+        after_time = after[name][0]
+        print(f"{name:<24} {before_time * 1000:>7.2f} ms {after_time * 1000:>7.2f} ms {before_time / after_time:>7.1f}x")
+
+    print("\nQuery plans (before -> after)")
+    for name, (_, before_plan) in before.items():
+        print(f"\n{name}")
+        for step in before_plan:
+            print(f"  - {step}")
+        for step in after[name][1]:
+            print(f"  + {step}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark coupon search: ILIKE scan vs the in-process inverted index
+Builds a synthetic SQLite dataset and reports p50/p99 latency per backend
+
+Usage: python bench_search.py [--coupons 1000000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from models_sqlite import Base, Store, Coupon
+from inverted_index import CouponIndex
+
+BRANDS = ["Nike", "Adidas", "Zalando", "Asos", "Lazada", "Shopee", "Flipkart", "Walmart",
+          "Target", "Uniqlo", "Sephora", "Decathlon", "Ikea", "Tesco", "Grab", "Zomato"]
+ADJECTIVES = ["exclusive", "limited", "seasonal", "flash", "weekend", "student", "member", "holiday"]
+PRODUCTS = ["shoes", "jackets", "dresses", "laptops", "phones", "groceries", "furniture", "toys",
+            "skincare", "headphones", "watches", "books", "delivery", "pizza", "sneakers", "bags"]
+PERKS = ["free shipping", "bonus points", "gift wrap", "next day delivery", "extended returns"]
+
+
+def synthetic_coupon(rng: random.Random, store_id: int, brand: str, n: int) -> dict:
+    percent = rng.choice([5, 10, 15, 20, 25, 30, 40, 50])
+    product = rng.choice(PRODUCTS)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "store_id": store_id,
+        "code": f"{product[:4].upper()}{percent}{n}",
+        "title": f"{percent}% off {rng.choice(ADJECTIVES)} {product} at {brand}",
+        "description": f"Plus {rng.choice(PERKS)} on {rng.choice(PRODUCTS)} orders",
+        "is_active": True,
+        "scraped_at": datetime.utcnow(),
+        "created_at": datetime.utcnow(),
+    }
+
+
+def build_dataset(path: str, coupon_count: int, seed: int = 42):
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        stores = [
+            {"name": f"{brand} {i}", "slug": f"{brand.lower()}-{i}", "domain": f"{brand.lower()}{i}.example.com",
+             "region": rng.choice(["america", "europe", "asia"]), "country": "US", "is_active": True}
+            for i in range(10) for brand in BRANDS
+        ]
+        conn.execute(insert(Store), stores)
+
+        batch = []
+        for n in range(coupon_count):
+            store_index = n % len(stores)
+            batch.append(synthetic_coupon(rng, store_index + 1, stores[store_index]["name"], n))
+            if len(batch) == 10000:
+                conn.execute(insert(Coupon), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Coupon), batch)
+
+        # Give the planner statistics, as a long-running database would have
+        conn.execute(text("ANALYZE"))
+
+    return engine
+
+
+def query_terms(rng: random.Random, count: int):
+    pool = PRODUCTS + [brand.lower() for brand in BRANDS] + ADJECTIVES
+    queries = []
+    for _ in range(count):
+        words = rng.sample(pool, rng.choice([1, 1, 2]))
+        # Half the queries are typed-so-far prefixes
+        if rng.random() < 0.5:
+            words[-1] = words[-1][:max(3, len(words[-1]) - 2)]
+        queries.append(" ".join(words))
+    return queries
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(name: str, samples):
+    print(f"{name:<16} p50 {percentile(samples, 50) * 1000:9.2f} ms   "
+          f"p99 {percentile(samples, 99) * 1000:9.2f} ms   "
+          f"mean {statistics.mean(samples) * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coupons", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20, help="page size fetched per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Building {args.coupons:,} synthetic coupons...")
+        started = time.perf_counter()
+        engine = build_dataset(path, args.coupons)
+        print(f"  built in {time.perf_counter() - started:.1f}s")
+
+        Session = sessionmaker(bind=engine)
+        db = Session()
+
+        index = CouponIndex()
+        started = time.perf_counter()
+        index.load(db)
+        print(f"  index loaded {len(index):,} coupons in {time.perf_counter() - started:.1f}s")
+
+        queries = query_terms(random.Random(7), args.queries)
+
+        # Both paths do what get_coupons does: a total plus one page
+        ilike_samples = []
+        for search in queries:
+            started = time.perf_counter()
+            query = db.query(Coupon).join(Store).filter(
+                Coupon.is_active == True,
+                Coupon.title.ilike(f"%{search}%")
+            )
+            query.count()
+            query.limit(args.limit).all()
+            ilike_samples.append(time.perf_counter() - started)
+
+        index_samples = []
+        for search in queries:
+            started = time.perf_counter()
+            coupon_ids = index.search(search, limit=1000)
+            query = db.query(Coupon).join(Store).filter(
+                Coupon.is_active == True,
+                Coupon.id.in_(coupon_ids)
+            )
+            query.count()
+            query.filter(Coupon.id.in_(coupon_ids[:args.limit])).all()
+            index_samples.append(time.perf_counter() - started)
+
+        db.close()
+        engine.dispose()
+
+    print(f"\n{args.queries} queries, page size {args.limit}")
+    report("ILIKE", ilike_samples)
+    report("inverted index", index_samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark coupon listing serialization: ORM hydration + jsonable_encoder
+vs column projection + orjson, for 20 and 100 row pages
+
+Usage: python bench_serialization.py [--iterations 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, contains_eager
+from sqlalchemy.pool import StaticPool
+
+from models_sqlite import Base, Store, Coupon
+from responses import FastJSONResponse, rows_to_dicts
+from routers.coupons import COUPON_LIST_COLUMNS, COUPON_LIST_FIELDS
+
+
+def build_dataset(coupon_count: int = 5000, seed: int = 42):
+    rng = random.Random(seed)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    stores = [
+        Store(name=f"Store {i}", slug=f"store-{i}", domain=f"store{i}.example.com",
+              region=rng.choice(["america", "europe", "asia"]), country="US",
+              store_type="retail", category="general")
+        for i in range(100)
+    ]
+    db.add_all(stores)
+    db.flush()
+    for n in range(coupon_count):
+        db.add(Coupon(
+            store_id=stores[n % len(stores)].id,
+            code=f"SAVE{n}",
+            title=f"{rng.choice([10, 20, 30])}% off everything",
+            description="Valid on full-price items only",
+            discount_type="percentage",
+            discount_value=Decimal(rng.choice(["10.00", "20.00", "30.00"])),
+            expires_at=datetime.utcnow() + timedelta(days=rng.randint(1, 60)),
+        ))
+    db.commit()
+    db.close()
+    return sessionmaker(bind=engine)
+
+
+def orm_page(db, limit: int) -> bytes:
+    """The previous listing path: hydrate Coupon + Store, copy into dicts, jsonable_encoder"""
+    coupons = db.query(Coupon).join(Store).options(contains_eager(Coupon.store)).filter(
+        Coupon.is_active == True
+    ).order_by(Coupon.created_at.desc(), Coupon.id.desc()).limit(limit).all()
+    coupons_data = []
+    for coupon in coupons:
+        coupons_data.append({
+            "id": coupon.id,
+            "title": coupon.title,
+            "description": coupon.description,
+            "code": coupon.code,
+            "discount_type": coupon.discount_type,
+            "discount_value": coupon.discount_value,
+            "expires_at": coupon.expires_at,
+            "store_name": coupon.store.name,
+            "store_slug": coupon.store.slug,
+            "store_domain": coupon.store.domain,
+            "region": coupon.store.region,
+            "country": coupon.store.country,
+            "store_type": coupon.store.store_type,
+            "category": coupon.store.category,
+            "created_at": coupon.created_at,
+            "scraped_at": coupon.scraped_at
+        })
+    return JSONResponse(jsonable_encoder({"coupons": coupons_data})).body
+
+
+def projected_page(db, limit: int) -> bytes:
+    """The current listing path: column projection, rows_to_dicts, orjson"""
+    rows = db.query(*COUPON_LIST_COLUMNS).select_from(Coupon).join(Store).filter(
+        Coupon.is_active == True
+    ).order_by(Coupon.created_at.desc(), Coupon.id.desc()).limit(limit).all()
+    return FastJSONResponse({"coupons": rows_to_dicts(COUPON_LIST_FIELDS, rows)}).body
+
+
+def measure(Session, page, limit: int, iterations: int):
+    # Fresh session per request, as get_db provides
+    for _ in range(20):
+        db = Session()
+        page(db, limit)
+        db.close()
+
+    started = time.process_time()
+    for _ in range(iterations):
+        db = Session()
+        page(db, limit)
+        db.close()
+    cpu = (time.process_time() - started) / iterations
+
+    tracemalloc.start()
+    db = Session()
+    snapshot_before = tracemalloc.take_snapshot()
+    page(db, limit)
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    db.close()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, "filename") if stat.count_diff > 0)
+
+    return cpu, peak, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    Session = build_dataset()
+    print(f"{'path':<12} {'rows':>5} {'cpu/request':>13} {'peak alloc':>12} {'new blocks':>11}")
+    for limit in (20, 100):
+        for name, page in (("orm", orm_page), ("projected", projected_page)):
+            cpu, peak, blocks = measure(Session, page, limit, args.iterations)
+            print(f"{name:<12} {limit:>5} {cpu * 1000:>10.3f} ms {peak / 1024:>9.1f} KB {blocks:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from fastapi import Request
+from fastapi.responses import Response
+from typing import Iterable, Optional
+from urllib.parse import urlencode
+from config import settings
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Response cache for the public listing endpoints.
+# Entries are tagged with the stores/regions they were built from; the scrapers
+# publish the tags they touched on CACHE_INVALIDATION_CHANNEL after each commit
+# (see scrapers/tasks.py) and every API process drops the matching entries.
+
+REGIONS = ("america", "europe", "asia")
+
+# Response headers kept with the cached body so hits can still answer 304s
+CACHED_HEADERS = ("etag", "last-modified", "cache-control")
+
+
+def store_tag(slug: str) -> str:
+    return f"store:{slug}"
+
+
+def region_tag(region: str) -> str:
+    return f"region:{region}"
+
+
+def listing_tags(region: Optional[str] = None, store_slug: Optional[str] = None):
+    """Tags for a listing response given its region/store filters"""
+    if store_slug:
+        return [store_tag(store_slug)]
+    if region:
+        return [region_tag(region)]
+    return [region_tag(name) for name in REGIONS]
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL and a tag -> keys index"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, tags, body)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key: str, body: bytes, tags: Iterable[str], ttl: int):
+        tags = tuple(tags)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, tags, body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    dropped += self._drop(key)
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _drop(self, key: str) -> int:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return 0
+        for tag in entry[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return 1
+
+
+class RedisBackend:
+    """Shared cache in Redis; tags are Redis sets of cache keys"""
+
+    KEY_PREFIX = "response:"
+    TAG_PREFIX = "response-tag:"
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(self.KEY_PREFIX + key)
+
+    def set(self, key: str, body: bytes, tags: Iterable[str], ttl: int):
+        pipe = self._redis.pipeline()
+        pipe.setex(self.KEY_PREFIX + key, ttl, body)
+        for tag in tags:
+            pipe.sadd(self.TAG_PREFIX + tag, key)
+            pipe.expire(self.TAG_PREFIX + tag, ttl)
+        pipe.execute()
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        for tag in tags:
+            tag_key = self.TAG_PREFIX + tag
+            keys = self._redis.smembers(tag_key)
+            if keys:
+                dropped += self._redis.delete(*(self.KEY_PREFIX + key.decode() for key in keys))
+            self._redis.delete(tag_key)
+        return dropped
+
+    def clear(self):
+        for pattern in (self.KEY_PREFIX + "*", self.TAG_PREFIX + "*"):
+            for key in self._redis.scan_iter(pattern):
+                self._redis.delete(key)
+
+
+class ResponseCache:
+    """
+    Caches serialized JSON bodies keyed on path and normalized query params.
+    Stored values are a JSON header line followed by the body.
+    """
+
+    def __init__(self, backend=None, ttl: int = 300):
+        self.backend = backend
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def key(request: Request) -> str:
+        params = sorted((name, value) for name, value in request.query_params.multi_items() if value != "")
+        return f"{request.url.path}?{urlencode(params)}"
+
+    def get(self, key: str) -> Optional[Response]:
+        if not self.enabled:
+            return None
+        try:
+            body = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        if body is None:
+            return None
+        headers, _, body = body.partition(b"\n")
+        return Response(content=body, media_type="application/json", headers=json.loads(headers))
+
+    def set(self, key: str, response: Response, tags: Iterable[str]):
+        if not self.enabled:
+            return
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        try:
+            self.backend.set(key, json.dumps(headers).encode() + b"\n" + response.body, tags, self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        if not self.enabled:
+            return 0
+        return self.backend.invalidate(tags)
+
+
+def create_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.CACHE_MAX_ENTRIES)
+    return None
+
+
+response_cache = ResponseCache(create_backend(), ttl=settings.CACHE_TTL_SECONDS)
+
+
+def listen_for_invalidations():
+    """Drop cached responses for tags published by the scrapers (runs in a thread)"""
+    import redis
+
+    while True:
+        try:
+            pubsub = redis.Redis.from_url(settings.REDIS_URL).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+            logger.info(f"Listening for cache invalidations on {settings.CACHE_INVALIDATION_CHANNEL}")
+            for message in pubsub.listen():
+                tags = json.loads(message["data"])
+                dropped = response_cache.invalidate(tags)
+                logger.info(f"Invalidated {dropped} cached responses for {tags}")
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener error: {e}, retrying in 30s")
+            time.sleep(30)
+
+
+def start_invalidation_listener():
+    if not response_cache.enabled:
+        return
+    thread = threading.Thread(target=listen_for_invalidations, name="cache-invalidation", daemon=True)
+    thread.start()
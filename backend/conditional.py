@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Any, Mapping, Optional
+from config import settings
+from models_sqlite import Store
+import hashlib
+
+# HTTP validators (ETag / Last-Modified) for the public read endpoints.
+# Listing ETags come from the request's cache key plus a watermark of the stores
+# behind it, so a revalidation is answered with 304 before the payload is
+# queried or serialized. Coupons only change through scrape_store and
+# cleanup_expired_coupons, both of which move the store watermark.
+# Listings and store pages send no Last-Modified: stores joining or leaving a
+# listing and counter changes (expiry cleanup) do not move any timestamp, so
+# If-Modified-Since would answer 304 for changed content. Only the ETag,
+# which covers the whole watermark, revalidates them.
+
+VALIDATOR_HEADERS = ("etag", "last-modified", "cache-control")
+
+
+def cache_control() -> str:
+    return (
+        f"public, max-age={settings.HTTP_MAX_AGE_SECONDS}, "
+        f"s-maxage={settings.HTTP_SHARED_MAX_AGE_SECONDS}, "
+        f"stale-while-revalidate={settings.HTTP_STALE_WHILE_REVALIDATE_SECONDS}"
+    )
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC (or aware) datetime as an HTTP date"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(key: str, *watermark: Any, last_modified: Optional[datetime] = None) -> dict:
+    """
+    ETag, Last-Modified and Cache-Control for a response identified by key.
+    The ETag is weak because GZipMiddleware may re-encode the body.
+    """
+    digest = hashlib.blake2b(repr((key,) + watermark).encode(), digest_size=16).hexdigest()
+    headers = {"etag": f'W/"{digest}"', "cache-control": cache_control()}
+    if last_modified is not None:
+        headers["last-modified"] = http_date(last_modified)
+    return headers
+
+
+def store_watermark(db: Session, *filters):
+    """
+    (latest scrape, store set fingerprint, active coupon total) over the stores matching filters.
+    The id sum changes when a store joins or leaves the set.
+    """
+    return db.query(
+        func.max(Store.last_scraped_at),
+        func.coalesce(func.sum(Store.id), 0),
+        func.coalesce(func.sum(Store.active_coupon_count), 0)
+    ).filter(*filters).one()
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def not_modified(request: Request, headers: Mapping[str, str]) -> Optional[Response]:
+    """
+    A 304 carrying the validators if the request's preconditions match them, else None.
+    If-None-Match takes precedence over If-Modified-Since.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers.get("etag")
+        if etag is None or not _etag_matches(etag, if_none_match):
+            return None
+    else:
+        last_modified = headers.get("last-modified")
+        if_modified_since = request.headers.get("if-modified-since")
+        if last_modified is None or if_modified_since is None:
+            return None
+        try:
+            if parsedate_to_datetime(last_modified) > parsedate_to_datetime(if_modified_since):
+                return None
+        except (TypeError, ValueError):
+            return None
+
+    return Response(
+        status_code=304,
+        headers={name: headers[name] for name in VALIDATOR_HEADERS if name in headers}
+    )
@@ -14,10 +14,25 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./couponfinder.db"
     
+    # Search: "database" (FTS5 / tsvector, ILIKE fallback) or "memory" (in-process inverted index)
+    SEARCH_BACKEND: str = "database"
+    SEARCH_INDEX_REFRESH_SECONDS: int = 60
+    
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     UPSTASH_REDIS_URL: Optional[str] = None
     
+    # Response cache: "memory" (per-process LRU), "redis" (shared) or "none"
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_INVALIDATION_CHANNEL: str = "cache-invalidation"
+    
+    # HTTP caching for public read endpoints (browsers and CDNs revalidate with ETag)
+    HTTP_MAX_AGE_SECONDS: int = 30
+    HTTP_SHARED_MAX_AGE_SECONDS: int = 60
+    HTTP_STALE_WHILE_REVALIDATE_SECONDS: int = 30
+    
     # JWT
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
@@ -0,0 +1,69 @@
+"""
+Shared fixtures for the backend tests: a fresh in-memory SQLite database per
+test module and the API running against it. Seed data stays in each module.
+"""
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from main import app
+from cache import response_cache
+from database import get_db
+from models_sqlite import Base
+from routers import stores, coupons
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module")
+def cache_backend():
+    """Response cache backend the API runs with; None keeps requests on the database path"""
+    return None
+
+
+@pytest.fixture(scope="module")
+def client(session_factory, cache_backend):
+    """The app on the module's database, with rate limits off and cache_backend swapped in"""
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    stores.limiter.enabled = False
+    coupons.limiter.enabled = False
+    saved_backend = response_cache.backend
+    response_cache.backend = cache_backend
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        stores.limiter.enabled = True
+        coupons.limiter.enabled = True
+        response_cache.backend = saved_backend
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, inspect, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
 from config import settings
 from typing import Generator
@@ -28,4 +29,103 @@ def init_db():
     # Use SQLite models for local development
     from models_sqlite import Base
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(Base.metadata)
+    add_missing_indexes(Base.metadata)
     print("Database tables created successfully!")
+    from search import install_search_index
+    install_search_index(engine)
+    fill_region_stats()
+
+# Region stats buckets aggregated from the store counters; scrapers/tasks.py
+# (refresh_region_stats) builds the same rows
+def aggregate_region_stats(db: Session):
+    from models_sqlite import Store
+    return db.query(
+        Store.region,
+        Store.country,
+        func.coalesce(Store.store_type, ''),
+        func.coalesce(Store.category, ''),
+        func.count(Store.id),
+        func.coalesce(func.sum(Store.active_coupon_count), 0)
+    ).filter(
+        Store.is_active == True
+    ).group_by(Store.region, Store.country, Store.store_type, Store.category).all()
+
+# Build region_stats for a new table or one the scrapers have not built yet
+def fill_region_stats():
+    from models_sqlite import RegionStat
+    db = SessionLocal()
+    try:
+        if db.query(RegionStat.id).first() is not None:
+            return
+        rows = aggregate_region_stats(db)
+        db.add_all([
+            RegionStat(
+                region=region, country=country, store_type=store_type, category=category,
+                store_count=store_count, coupon_count=coupon_count
+            )
+            for region, country, store_type, category, store_count, coupon_count in rows
+        ])
+        db.commit()
+        print(f"Built {len(rows)} region stats rows")
+    finally:
+        db.close()
+
+# Add columns introduced after a table was first created
+def add_missing_columns(metadata):
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    default = f"'{default}'" if isinstance(default, str) else default.text
+                    ddl += f" DEFAULT {default}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                print(f"Added column {table.name}.{column.name}")
+
+# Column sort options an index declares, in the form the Postgres inspector reports them
+def declared_sorting(index):
+    from models_sqlite import NullsFirst
+    return {
+        expression.name: ('nulls_first',)
+        for expression in index.expressions if isinstance(expression, NullsFirst)
+    }
+
+# Create indexes declared after a table was first created, and on Postgres rebuild
+# keyset indexes created before they declared their NULLS FIRST order
+def add_missing_indexes(metadata):
+    inspector = inspect(engine)
+    created = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"]: index for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                if engine.dialect.name != 'postgresql' or \
+                        existing[index.name].get("column_sorting", {}) == declared_sorting(index):
+                    continue
+                index.drop(bind=engine)
+                print(f"Rebuilding index {index.name} with its declared sort order")
+            try:
+                index.create(bind=engine)
+            except IntegrityError as e:
+                # Unique indexes over existing duplicates need the data cleaned up first
+                print(f"Could not create index {index.name}, remove duplicate rows and restart: {e.orig}")
+                continue
+            created.append(index.name)
+            print(f"Created index {index.name}")
+    
+    if created:
+        # Refresh planner statistics so the new indexes are considered
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
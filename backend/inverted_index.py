@@ -0,0 +1,309 @@
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import heapq
+import math
+import re
+import threading
+import time
+
+# In-process inverted index for coupon search, for deployments where the
+# database cannot host a full-text index. Posting lists are stored as
+# parallel arrays of document numbers and term frequencies, ranked with BM25.
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Term frequency multipliers per field (a light BM25F)
+FIELD_WEIGHTS = {
+    "title": 3,
+    "code": 3,
+    "store_name": 2,
+    "description": 1,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Max dictionary terms a single prefix may expand to
+MAX_PREFIX_EXPANSION = 64
+
+# Rebuild posting lists once this share of documents is deleted
+COMPACT_RATIO = 0.25
+
+# Recompute BM25 length norms once the average document length drifts this much
+NORM_DRIFT = 0.05
+
+# Re-read rows this far behind the watermark on sync. The scrapers stamp
+# updated_at before the scrape commits, so a long scrape can land behind the
+# watermark (matches task_time_limit in scrapers/celery_app.py). Rows already
+# indexed at the same updated_at are skipped.
+SYNC_OVERLAP = timedelta(minutes=10)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class CouponIndex:
+    """
+    Inverted index over coupon title, description, code and store name.
+    Documents are addressed internally by a dense integer; updates append a
+    new document and tombstone the old one until the next compaction.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._terms: List[str] = []  # sorted lazily, for prefix lookups
+        self._terms_sorted = True
+        self._doc_keys: List[Optional[str]] = []  # doc number -> coupon id
+        self._doc_lengths = array("I")
+        self._key_to_doc: Dict[str, int] = {}
+        self._versions: Dict[str, Optional[datetime]] = {}  # coupon id -> updated_at indexed
+        self._store_names: Dict[int, str] = {}
+        self._deleted = 0
+        self._total_length = 0
+        self._norms: Optional[array] = None  # BM25 length norms, rebuilt lazily
+        self._norms_average = 0.0
+        self.watermark: Optional[datetime] = None
+        self.last_sync = 0.0
+
+    def __len__(self):
+        return len(self._key_to_doc)
+
+    def add(self, coupon_id: str, title: Optional[str], description: Optional[str],
+            code: Optional[str], store_name: Optional[str]):
+        """Index a coupon, replacing any previous version of it"""
+        frequencies: Dict[str, int] = {}
+        length = 0
+        for field, text in (("title", title), ("description", description),
+                            ("code", code), ("store_name", store_name)):
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                frequencies[token] = frequencies.get(token, 0) + weight
+                length += weight
+
+        with self._lock:
+            self._remove(coupon_id)
+            doc = len(self._doc_keys)
+            self._doc_keys.append(coupon_id)
+            self._doc_lengths.append(length)
+            self._key_to_doc[coupon_id] = doc
+            self._total_length += length
+            if self._norms is not None:
+                self._norms.append(self._norm(length, self._norms_average))
+
+            for token, frequency in frequencies.items():
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = (array("I"), array("H"))
+                    self._postings[token] = posting
+                    self._terms.append(token)
+                    self._terms_sorted = False
+                posting[0].append(doc)
+                posting[1].append(min(frequency, 65535))
+            self._maybe_compact()
+
+    def remove(self, coupon_id: str):
+        """Drop a coupon from the index"""
+        with self._lock:
+            self._remove(coupon_id)
+            self._maybe_compact()
+
+    def _remove(self, coupon_id: str):
+        self._versions.pop(coupon_id, None)
+        doc = self._key_to_doc.pop(coupon_id, None)
+        if doc is None:
+            return
+        self._doc_keys[doc] = None
+        self._total_length -= self._doc_lengths[doc]
+        self._deleted += 1
+
+    def _maybe_compact(self):
+        if self._deleted > COMPACT_RATIO * len(self._doc_keys):
+            self._compact()
+
+    def _compact(self):
+        """Renumber live documents and drop tombstoned postings"""
+        renumber = array("i", [-1]) * len(self._doc_keys)
+        doc_keys = []
+        doc_lengths = array("I")
+        for doc, key in enumerate(self._doc_keys):
+            if key is not None:
+                renumber[doc] = len(doc_keys)
+                doc_keys.append(key)
+                doc_lengths.append(self._doc_lengths[doc])
+
+        postings = {}
+        for token, (docs, frequencies) in self._postings.items():
+            new_docs, new_frequencies = array("I"), array("H")
+            for doc, frequency in zip(docs, frequencies):
+                if renumber[doc] >= 0:
+                    new_docs.append(renumber[doc])
+                    new_frequencies.append(frequency)
+            if new_docs:
+                postings[token] = (new_docs, new_frequencies)
+
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._terms_sorted = True
+        self._doc_keys = doc_keys
+        self._doc_lengths = doc_lengths
+        self._key_to_doc = {key: doc for doc, key in enumerate(doc_keys)}
+        self._deleted = 0
+        self._norms = None
+
+    @staticmethod
+    def _norm(length: int, average_length: float) -> float:
+        return BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+
+    def _length_norms(self) -> array:
+        """Per-document BM25 length normalisation, k1 * (1 - b + b * dl / avgdl)"""
+        average_length = self._total_length / max(len(self._key_to_doc), 1) or 1.0
+        if self._norms is None or abs(average_length - self._norms_average) > NORM_DRIFT * self._norms_average:
+            self._norms_average = average_length
+            self._norms = array("d", (self._norm(length, average_length) for length in self._doc_lengths))
+        return self._norms
+
+    def _expand(self, term: str) -> List[str]:
+        """Dictionary terms starting with term, most frequent first when capped"""
+        if not self._terms_sorted:
+            self._terms.sort()
+            self._terms_sorted = True
+        start = bisect_left(self._terms, term)
+        end = bisect_left(self._terms, term[:-1] + chr(ord(term[-1]) + 1), start)
+        matches = self._terms[start:end]
+        if len(matches) > MAX_PREFIX_EXPANSION:
+            matches = heapq.nlargest(MAX_PREFIX_EXPANSION, matches,
+                                     key=lambda token: len(self._postings[token][0]))
+        return matches
+
+    def search(self, query: str, limit: int = 1000) -> List[str]:
+        """
+        Coupon ids matching every query term (prefix match), best first
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            live = len(self._key_to_doc)
+            if not live:
+                return []
+            doc_keys = self._doc_keys
+            norms = self._length_norms()
+
+            # Expand each distinct term and score the rarest first, so later
+            # terms only need to look at documents that are still candidates
+            expanded = []
+            for term in dict.fromkeys(terms):
+                tokens = self._expand(term)
+                if not tokens:
+                    return []
+                expanded.append((sum(len(self._postings[token][0]) for token in tokens), tokens))
+            expanded.sort(key=lambda item: item[0])
+
+            scores: Optional[Dict[int, float]] = None
+            for _, tokens in expanded:
+                term_scores: Dict[int, float] = {}
+                get = term_scores.get
+                for token in tokens:
+                    docs, frequencies = self._postings[token]
+                    idf = math.log(1 + (live - len(docs) + 0.5) / (len(docs) + 0.5))
+                    weight = idf * (BM25_K1 + 1)
+                    for doc, frequency in zip(docs, frequencies):
+                        if scores is None:
+                            if doc_keys[doc] is None:
+                                continue
+                        elif doc not in scores:
+                            continue
+                        term_scores[doc] = get(doc, 0.0) + weight * frequency / (frequency + norms[doc])
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc: scores[doc] + score for doc, score in term_scores.items()}
+                if not scores:
+                    return []
+
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [doc_keys[doc] for doc, _ in ranked]
+
+    def _rows(self, db):
+        from models_sqlite import Store, Coupon
+
+        return db.query(
+            Coupon.id, Coupon.title, Coupon.description, Coupon.code, Store.name,
+            Coupon.updated_at, Coupon.is_active
+        ).join(Store)
+
+    def _apply(self, rows):
+        """Index active rows not already indexed at their updated_at, drop inactive ones"""
+        for coupon_id, title, description, code, store_name, updated_at, is_active in rows:
+            if not is_active:
+                self.remove(coupon_id)
+            elif coupon_id not in self._key_to_doc or self._versions.get(coupon_id) != updated_at:
+                self.add(coupon_id, title, description, code, store_name)
+                self._versions[coupon_id] = updated_at
+            if updated_at and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+    def _renamed_stores(self, db) -> List[int]:
+        """Refresh the store name snapshot; ids of stores renamed since the last one"""
+        from models_sqlite import Store
+
+        names = dict(db.query(Store.id, Store.name).all())
+        renamed = [store_id for store_id, name in names.items()
+                   if store_id in self._store_names and self._store_names[store_id] != name]
+        self._store_names = names
+        return renamed
+
+    def load(self, db):
+        """Build the index from all active coupons"""
+        from models_sqlite import Coupon
+
+        with self._lock:
+            self._clear()
+            started_at = datetime.utcnow()
+            self._renamed_stores(db)
+            self._apply(self._rows(db).filter(Coupon.is_active == True).yield_per(10000))
+            # Rows from before updated_at existed have none; sync from now on
+            self.watermark = self.watermark or started_at - SYNC_OVERLAP
+            self.last_sync = time.monotonic()
+
+    def sync(self, db):
+        """
+        Apply coupon writes since the last load or sync: scraper upserts,
+        deactivations and expiry, and renames of their stores
+        """
+        from models_sqlite import Coupon
+
+        with self._lock:
+            if self.watermark is None:
+                return self.load(db)
+            self._apply(self._rows(db).filter(
+                Coupon.updated_at > self.watermark - SYNC_OVERLAP
+            ).yield_per(10000))
+
+            renamed = self._renamed_stores(db)
+            if renamed:
+                rows = self._rows(db).filter(Coupon.store_id.in_(renamed), Coupon.is_active == True)
+                for coupon_id, title, description, code, store_name, updated_at, _ in rows.yield_per(10000):
+                    self.add(coupon_id, title, description, code, store_name)
+                    self._versions[coupon_id] = updated_at
+            self.last_sync = time.monotonic()
+
+    def sync_if_stale(self, db, max_age_seconds: float):
+        if time.monotonic() - self.last_sync >= max_age_seconds:
+            self.sync(db)
+
+
+# Process-wide index used by the coupons router
+coupon_index = CouponIndex()
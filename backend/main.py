@@ -8,6 +8,7 @@ from slowapi.errors import RateLimitExceeded
 import sentry_sdk
 from config import settings
 from database import init_db
+from cache import start_invalidation_listener
 
 # Initialize Sentry
 if settings.SENTRY_DSN:
@@ -47,6 +48,16 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    if settings.SEARCH_BACKEND == "memory":
+        from database import SessionLocal
+        from inverted_index import coupon_index
+        db = SessionLocal()
+        try:
+            coupon_index.load(db)
+            print(f"Loaded {len(coupon_index)} coupons into the search index")
+        finally:
+            db.close()
+    start_invalidation_listener()
     print(f"{settings.APP_NAME} started successfully!")
 
 # Root endpoint
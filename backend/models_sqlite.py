@@ -1,11 +1,37 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, Numeric, UniqueConstraint, Index, text
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
 Base = declarative_base()
 
+# Partial index predicate for rows the API lists (matches `is_active == True` filters)
+ACTIVE_ONLY = {'postgresql_where': text('is_active'), 'sqlite_where': text('is_active = 1')}
+
+class NullsFirst(TextClause):
+    """
+    An index column that sorts NULLs first. Listings sort rows without created_at
+    as the oldest (see pagination.py): SQLite's default order, spelled out on Postgres.
+    """
+    inherit_cache = True
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.name = name
+
+@compiles(NullsFirst)
+def compile_nulls_first(element, compiler, **kw):
+    return element.name
+
+@compiles(NullsFirst, 'postgresql')
+def compile_nulls_first_postgresql(element, compiler, **kw):
+    return f"{element.name} NULLS FIRST"
+
+CREATED_NULLS_FIRST = NullsFirst('created_at')
+
 # Many-to-many relationship
 store_categories = Table('store_categories', Base.metadata,
     Column('store_id', Integer, ForeignKey('stores.id', ondelete='CASCADE')),
@@ -50,12 +76,24 @@ class Store(Base):
     is_active = Column(Boolean, default=True, index=True)
     scrape_frequency = Column(Integer, default=60)  # minutes
     last_scraped_at = Column(DateTime, nullable=True)
+    scrape_queued_at = Column(DateTime, nullable=True)  # set when scrape_all_stores queues a scrape, cleared once it is logged
+    active_coupon_count = Column(Integer, default=0, server_default='0', nullable=False)  # maintained by scrapers/tasks.py
+    last_coupon_added_at = Column(DateTime, nullable=True)
+    scrape_strategy = Column(String(20), nullable=True)  # generic or javascript, detected by scrapers/tasks.py
+    page_etag = Column(String(255), nullable=True)  # coupon page validators from the last scrape
+    page_last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(32), nullable=True)  # hash of the coupon texts extracted by the last scrape
     scraper_config = Column(Text, nullable=True)  # JSON as text for SQLite
     created_at = Column(DateTime, default=datetime.utcnow)
     
     coupons = relationship('Coupon', back_populates='store', cascade='all, delete-orphan')
     categories = relationship('Category', secondary=store_categories, back_populates='stores')
     scrape_logs = relationship('ScrapeLog', back_populates='store', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        Index('ix_stores_active_filters', 'region', 'country', 'store_type', 'category', **ACTIVE_ONLY),
+        Index('ix_stores_active_created', CREATED_NULLS_FIRST, 'id', **ACTIVE_ONLY),
+    )
 
 class Category(Base):
     __tablename__ = 'categories'
@@ -92,12 +130,21 @@ class Coupon(Base):
     view_count = Column(Integer, default=0)
     click_count = Column(Integer, default=0)
     is_active = Column(Boolean, default=True, index=True)
+    missed_scrapes = Column(Integer, default=0, server_default='0', nullable=False)  # consecutive scrapes without this code
     scraped_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # moved by content changes; inverted_index.py syncs on it
     
     store = relationship('Store', back_populates='coupons')
     clicks = relationship('CouponClick', back_populates='coupon', cascade='all, delete-orphan')
     feedbacks = relationship('CouponFeedback', back_populates='coupon', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        Index('ix_coupons_active_created', CREATED_NULLS_FIRST, 'id', **ACTIVE_ONLY),
+        Index('ix_coupons_active_store_created', 'store_id', CREATED_NULLS_FIRST, 'id', **ACTIVE_ONLY),
+        Index('ix_coupons_active_expires', 'expires_at', **ACTIVE_ONLY),
+        Index('uq_coupons_store_code', 'store_id', 'code', unique=True),
+    )
 
 class UserFavorite(Base):
     __tablename__ = 'user_favorites'
@@ -138,16 +185,37 @@ class ScrapeLog(Base):
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     store_id = Column(Integer, ForeignKey('stores.id', ondelete='CASCADE'), nullable=False, index=True)
-    status = Column(String(20), nullable=False)  # success, failed, partial
+    status = Column(String(20), nullable=False)  # success, failed, partial, unchanged
     coupons_found = Column(Integer, default=0)
     coupons_new = Column(Integer, default=0)
-    coupons_updated = Column(Integer, default=0)
+    coupons_updated = Column(Integer, default=0)  # codes seen again with changed content, or reactivated
+    coupons_deactivated = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
     duration_seconds = Column(Integer, nullable=True)
     scraped_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     store = relationship('Store', back_populates='scrape_logs')
 
+class RegionStat(Base):
+    """
+    Store and active coupon totals per (region, country, store_type, category),
+    maintained by scrapers/tasks.py so region stats are a small-table read
+    """
+    __tablename__ = 'region_stats'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    region = Column(String(20), nullable=False)
+    country = Column(String(50), nullable=False)
+    store_type = Column(String(50), nullable=False, default='')
+    category = Column(String(100), nullable=False, default='')  # '' for stores without a category
+    store_count = Column(Integer, nullable=False, default=0)
+    coupon_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('region', 'country', 'store_type', 'category', name='uq_region_stats_bucket'),
+    )
+
 class Subscription(Base):
     __tablename__ = 'subscriptions'
     
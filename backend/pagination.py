@@ -0,0 +1,66 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+from datetime import datetime
+from typing import Optional, Tuple, Any
+import base64
+import json
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: Any) -> str:
+    """Encode the (created_at, id) of the last row into an opaque cursor"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at) if created_at is not None else None, row_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def seek_past(created_at_column, id_column, created_at: Optional[datetime], row_id: Any, descending: bool):
+    """Filter for the rows after (created_at, id) in keyset order, NULL created_at first"""
+    is_null = created_at_column.is_(None)
+    if created_at is None:
+        # Within the NULL group only the id orders rows
+        if descending:
+            return and_(is_null, id_column < row_id)
+        return or_(and_(is_null, id_column > row_id), created_at_column.isnot(None))
+
+    key = tuple_(created_at_column, id_column)
+    last_seen = tuple_(created_at, row_id)
+    if descending:
+        return or_(key < last_seen, is_null)
+    return key > last_seen
+
+
+def keyset_paginate(query, created_at_column, id_column, limit: int, cursor: Optional[str] = None,
+                    page: int = 1, descending: bool = False):
+    """
+    Page a query ordered on (created_at, id).
+    With a cursor, seek past the last seen row instead of using OFFSET.
+    Rows without created_at sort as the oldest.
+    Returns (rows, next_cursor).
+    """
+    if descending:
+        query = query.order_by(created_at_column.desc().nulls_last(), id_column.desc())
+    else:
+        query = query.order_by(created_at_column.asc().nulls_first(), id_column)
+
+    if cursor:
+        query = query.filter(seek_past(created_at_column, id_column, *decode_cursor(cursor), descending))
+    else:
+        query = query.offset((page - 1) * limit)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,27 @@
+from fastapi.responses import JSONResponse
+from decimal import Decimal
+from typing import Any, Iterable, List, Sequence
+import orjson
+
+
+def _default(value: Any):
+    """Types orjson does not serialize natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-backed JSON response.
+    Return it directly from an endpoint to skip jsonable_encoder.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def rows_to_dicts(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[dict]:
+    """Map projected result rows to response dicts using precomputed field names"""
+    return [dict(zip(fields, row)) for row in rows]
@@ -1,7 +1,12 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import Optional, List
 from database import get_db
+from pagination import keyset_paginate
+from search import search_coupons
+from responses import FastJSONResponse, rows_to_dicts
+from cache import response_cache, listing_tags
+from conditional import validator_headers, store_watermark, not_modified
 from models_sqlite import Store, Coupon
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -9,6 +14,27 @@ from slowapi.util import get_remote_address
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
+# Columns selected for coupon listings, in response order
+COUPON_LIST_COLUMNS = (
+    Coupon.id,
+    Coupon.title,
+    Coupon.description,
+    Coupon.code,
+    Coupon.discount_type,
+    Coupon.discount_value,
+    Coupon.expires_at,
+    Store.name.label("store_name"),
+    Store.slug.label("store_slug"),
+    Store.domain.label("store_domain"),
+    Store.region,
+    Store.country,
+    Store.store_type,
+    Store.category,
+    Coupon.created_at,
+    Coupon.scraped_at,
+)
+COUPON_LIST_FIELDS = tuple(column.key for column in COUPON_LIST_COLUMNS)
+
 @router.get("/")
 @limiter.limit("60/minute")
 async def get_coupons(
@@ -21,68 +47,79 @@ async def get_coupons(
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
     Get all coupons with filters
-    """
-    query = db.query(Coupon).filter(Coupon.is_active == True)
     
-    # Join with Store to filter by store attributes
-    query = query.join(Store)
+    Pass the returned next_cursor back as cursor to page without OFFSET
+    """
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return not_modified(request, cached.headers) or cached
     
-    # Apply filters
+    # Store filters
+    store_filters = []
     if region:
-        query = query.filter(Store.region == region)
+        store_filters.append(Store.region == region)
     
     if country:
-        query = query.filter(Store.country == country)
+        store_filters.append(Store.country == country)
     
     if store_slug:
-        query = query.filter(Store.slug == store_slug)
+        store_filters.append(Store.slug == store_slug)
     
     if store_type:
-        query = query.filter(Store.store_type == store_type)
+        store_filters.append(Store.store_type == store_type)
     
     if category:
-        query = query.filter(Store.category == category)
+        store_filters.append(Store.category == category)
     
-    if search:
-        query = query.filter(Coupon.title.ilike(f"%{search}%"))
+    # Answer revalidations from the store watermark before touching coupons
+    last_scraped_at, store_ids, coupon_count = store_watermark(db, *store_filters)
+    validators = validator_headers(cache_key, last_scraped_at, store_ids, coupon_count)
+    unchanged = not_modified(request, validators)
+    if unchanged is not None:
+        return unchanged
     
-    # Get total count
-    total = query.count()
+    # Select only the response columns; no ORM objects are built for listings
+    query = db.query(*COUPON_LIST_COLUMNS).select_from(Coupon).filter(Coupon.is_active == True)
     
-    # Pagination
-    coupons = query.offset((page - 1) * limit).limit(limit).all()
+    # Join with Store to filter by store attributes
+    query = query.join(Store).filter(*store_filters)
     
-    # Format response
-    coupons_data = []
-    for coupon in coupons:
-        coupon_dict = {
-            "id": coupon.id,
-            "title": coupon.title,
-            "description": coupon.description,
-            "code": coupon.code,
-            "discount": coupon.discount,
-            "expiry_date": coupon.expiry_date,
-            "store_name": coupon.store.name,
-            "store_slug": coupon.store.slug,
-            "store_domain": coupon.store.domain,
-            "region": coupon.store.region,
-            "country": coupon.store.country,
-            "store_type": coupon.store.store_type,
-            "category": coupon.store.category,
-            "created_at": coupon.created_at,
-            "updated_at": coupon.updated_at
-        }
-        coupons_data.append(coupon_dict)
+    # The in-process search index keeps only its best MEMORY_SEARCH_LIMIT matches
+    total_capped = False
+    if search:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor cannot be combined with search")
+        query, total_capped = search_coupons(db, query, search)
     
-    return {
-        "coupons": coupons_data,
+    # Exact totals are skipped by default when paging with a cursor
+    if include_total is None:
+        include_total = cursor is None
+    total = query.count() if include_total else None
+    
+    # Pagination (search results keep their relevance order)
+    if search:
+        coupons = query.offset((page - 1) * limit).limit(limit).all()
+        next_cursor = None
+    else:
+        coupons, next_cursor = keyset_paginate(
+            query, Coupon.created_at, Coupon.id, limit,
+            cursor=cursor, page=page, descending=True
+        )
+    
+    response = FastJSONResponse({
+        "coupons": rows_to_dicts(COUPON_LIST_FIELDS, coupons),
         "total": total,
+        "total_capped": total_capped,
         "page": page,
-        "pages": (total + limit - 1) // limit,
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor,
         "filters": {
             "region": region,
             "country": country,
@@ -91,31 +128,43 @@ async def get_coupons(
             "category": category,
             "search": search
         }
-    }
+    }, headers=validators)
+    response_cache.set(cache_key, response, listing_tags(region=region, store_slug=store_slug))
+    return response
 
 @router.get("/{coupon_id}")
 @limiter.limit("60/minute")
 async def get_coupon(
     request: Request,
-    coupon_id: int,
+    coupon_id: str,
     db: Session = Depends(get_db)
 ):
     """
     Get single coupon by ID
     """
-    coupon = db.query(Coupon).filter(Coupon.id == coupon_id).first()
+    coupon = db.query(Coupon).options(joinedload(Coupon.store, innerjoin=True)).filter(Coupon.id == coupon_id).first()
     
     if not coupon:
         raise HTTPException(status_code=404, detail="Coupon not found")
     
-    return {
+    # updated_at moves with every write to the coupon, deactivation included
+    validators = validator_headers(
+        request.url.path, coupon.updated_at, coupon.scraped_at, coupon.is_active, coupon.store.last_scraped_at,
+        last_modified=coupon.updated_at
+    )
+    unchanged = not_modified(request, validators)
+    if unchanged is not None:
+        return unchanged
+    
+    return FastJSONResponse({
         "coupon": {
             "id": coupon.id,
             "title": coupon.title,
             "description": coupon.description,
             "code": coupon.code,
-            "discount": coupon.discount,
-            "expiry_date": coupon.expiry_date,
+            "discount_type": coupon.discount_type,
+            "discount_value": coupon.discount_value,
+            "expires_at": coupon.expires_at,
             "store_name": coupon.store.name,
             "store_slug": coupon.store.slug,
             "store_domain": coupon.store.domain,
@@ -124,21 +173,21 @@ async def get_coupon(
             "store_type": coupon.store.store_type,
             "category": coupon.store.category,
             "created_at": coupon.created_at,
-            "updated_at": coupon.updated_at
+            "scraped_at": coupon.scraped_at
         }
-    }
+    }, headers=validators)
 
 @router.post("/{coupon_id}/click")
 @limiter.limit("60/minute")
 async def track_coupon_click(
     request: Request,
-    coupon_id: int,
+    coupon_id: str,
     db: Session = Depends(get_db)
 ):
     """
     Track coupon click and return affiliate URL
     """
-    coupon = db.query(Coupon).filter(Coupon.id == coupon_id).first()
+    coupon = db.query(Coupon).options(joinedload(Coupon.store, innerjoin=True)).filter(Coupon.id == coupon_id).first()
     
     if not coupon:
         raise HTTPException(status_code=404, detail="Coupon not found")
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Optional, List
-from database import get_db
-from models_sqlite import Store, Coupon
+from database import get_db, aggregate_region_stats
+from pagination import keyset_paginate
+from search import search_stores
+from responses import FastJSONResponse, rows_to_dicts
+from cache import response_cache, listing_tags, REGIONS
+from conditional import validator_headers, store_watermark, not_modified
+from models_sqlite import Store, RegionStat
 from countries import get_countries_by_region, get_all_countries
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -10,6 +16,32 @@ from slowapi.util import get_remote_address
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
+# Columns selected for store listings, in response order
+STORE_LIST_COLUMNS = (
+    Store.id,
+    Store.name,
+    Store.slug,
+    Store.domain,
+    Store.logo_url,
+    Store.region,
+    Store.country,
+    Store.store_type,
+    Store.category,
+    Store.active_coupon_count.label("active_coupons_count"),
+    Store.created_at,
+)
+STORE_LIST_FIELDS = tuple(column.key for column in STORE_LIST_COLUMNS)
+
+# Region stats bucket columns followed by their totals
+REGION_STAT_COLUMNS = (
+    RegionStat.region,
+    RegionStat.country,
+    RegionStat.store_type,
+    RegionStat.category,
+    RegionStat.store_count,
+    RegionStat.coupon_count,
+)
+
 @router.get("/")
 @limiter.limit("60/minute")
 async def get_stores(
@@ -21,67 +53,79 @@ async def get_stores(
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
     Get all stores with filters
+    
+    Pass the returned next_cursor back as cursor to page without OFFSET
     """
-    query = db.query(Store).filter(Store.is_active == True)
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return not_modified(request, cached.headers) or cached
     
     # Apply filters
+    filters = [Store.is_active == True]
     if region:
-        query = query.filter(Store.region == region)
+        filters.append(Store.region == region)
     
     if country:
-        query = query.filter(Store.country == country)
+        filters.append(Store.country == country)
     
     if store_type:
-        query = query.filter(Store.store_type == store_type)
+        filters.append(Store.store_type == store_type)
     
     if category:
-        query = query.filter(Store.category == category)
+        filters.append(Store.category == category)
     
-    if search:
-        query = query.filter(Store.name.ilike(f"%{search}%"))
+    # Answer revalidations from the store watermark before building the page
+    last_scraped_at, store_ids, coupon_count = store_watermark(db, *filters)
+    validators = validator_headers(cache_key, last_scraped_at, store_ids, coupon_count)
+    unchanged = not_modified(request, validators)
+    if unchanged is not None:
+        return unchanged
     
-    # Get total count
-    total = query.count()
+    # Select only the response columns; no ORM objects are built for listings
+    query = db.query(*STORE_LIST_COLUMNS).filter(*filters)
     
-    # Pagination
-    stores = query.offset((page - 1) * limit).limit(limit).all()
+    if search:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor cannot be combined with search")
+        query = search_stores(db, query, search)
     
-    # Add active coupon count to each store
-    stores_with_counts = []
-    for store in stores:
-        store_dict = {
-            "id": store.id,
-            "name": store.name,
-            "slug": store.slug,
-            "domain": store.domain,
-            "logo_url": store.logo_url,
-            "region": store.region,
-            "country": store.country,
-            "store_type": store.store_type,
-            "category": store.category,
-            "active_coupons_count": db.query(Coupon).filter(
-                Coupon.store_id == store.id,
-                Coupon.is_active == True
-            ).count()
-        }
-        stores_with_counts.append(store_dict)
+    # Exact totals are skipped by default when paging with a cursor
+    if include_total is None:
+        include_total = cursor is None
+    total = query.count() if include_total else None
+    
+    # Pagination (search results keep their relevance order)
+    if search:
+        stores = query.offset((page - 1) * limit).limit(limit).all()
+        next_cursor = None
+    else:
+        stores, next_cursor = keyset_paginate(
+            query, Store.created_at, Store.id, limit,
+            cursor=cursor, page=page, descending=False
+        )
     
-    return {
-        "stores": stores_with_counts,
+    response = FastJSONResponse({
+        "stores": rows_to_dicts(STORE_LIST_FIELDS, stores),
         "total": total,
         "page": page,
-        "pages": (total + limit - 1) // limit,
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor,
         "filters": {
             "region": region,
             "country": country,
             "store_type": store_type,
             "category": category
         }
-    }
+    }, headers=validators)
+    response_cache.set(cache_key, response, listing_tags(region=region))
+    return response
 
 @router.get("/countries")
 @limiter.limit("60/minute")
@@ -92,17 +136,26 @@ async def get_countries(
     """
     Get all countries, optionally filtered by region
     """
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return not_modified(request, cached.headers) or cached
+    
     if region:
         countries = get_countries_by_region(region)
     else:
         countries = get_all_countries()
     
-    return {
+    response = FastJSONResponse({
         "countries": [
             {"code": code, "name": name}
             for code, name in countries.items()
         ]
-    }
+    })
+    # Countries only change with a deploy: no invalidation tags, ETag from the body
+    response.headers.update(validator_headers(cache_key, response.body))
+    response_cache.set(cache_key, response, [])
+    return not_modified(request, response.headers) or response
 
 @router.get("/{slug}")
 @limiter.limit("60/minute")
@@ -119,12 +172,14 @@ async def get_store(
     if not store:
         return {"error": "Store not found"}, 404
     
-    active_coupons_count = db.query(Coupon).filter(
-        Coupon.store_id == store.id,
-        Coupon.is_active == True
-    ).count()
+    validators = validator_headers(
+        request.url.path, store.last_scraped_at, store.active_coupon_count, store.is_active
+    )
+    unchanged = not_modified(request, validators)
+    if unchanged is not None:
+        return unchanged
     
-    return {
+    return FastJSONResponse({
         "store": {
             "id": store.id,
             "name": store.name,
@@ -135,34 +190,53 @@ async def get_store(
             "country": store.country,
             "store_type": store.store_type,
             "category": store.category,
-            "active_coupons_count": active_coupons_count,
-            "last_scraped_at": store.last_scraped_at
+            "active_coupons_count": store.active_coupon_count,
+            "last_scraped_at": store.last_scraped_at,
+            "last_coupon_added_at": store.last_coupon_added_at
         }
-    }
+    }, headers=validators)
+
+def _stat_totals():
+    return {"stores": 0, "coupons": 0, "countries": {}, "store_types": {}, "categories": {}}
 
 @router.get("/regions/stats")
 @limiter.limit("60/minute")
 async def get_region_stats(request: Request, db: Session = Depends(get_db)):
     """
-    Get statistics for each region
+    Get statistics for each region, broken down by country, store type and category
     """
-    stats = {}
-    
-    for region in ["america", "europe", "asia"]:
-        store_count = db.query(Store).filter(
-            Store.region == region,
-            Store.is_active == True
-        ).count()
-        
-        coupon_count = db.query(Coupon).join(Store).filter(
-            Store.region == region,
-            Store.is_active == True,
-            Coupon.is_active == True
-        ).count()
-        
-        stats[region] = {
-            "stores": store_count,
-            "coupons": coupon_count
-        }
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return not_modified(request, cached.headers) or cached
+    
+    # One read of the region_stats summary maintained by the scrapers, with the
+    # live active store count to notice stores the table does not cover yet
+    active_stores = db.query(func.count(Store.id)).filter(Store.is_active == True).scalar_subquery()
+    rows = db.query(*REGION_STAT_COLUMNS, active_stores).all()
+    if rows and sum(row.store_count for row in rows) == rows[0][-1]:
+        rows = [tuple(row)[:-1] for row in rows]
+    else:
+        # Not built yet, or stores added or deactivated since: aggregate the store counters directly
+        rows = aggregate_region_stats(db)
+    
+    validators = validator_headers(cache_key, *(tuple(row) for row in rows))
+    unchanged = not_modified(request, validators)
+    if unchanged is not None:
+        return unchanged
+    
+    stats = {region: _stat_totals() for region in REGIONS}
+    for region, country, store_type, category, store_count, coupon_count in rows:
+        region_stats = stats.setdefault(region, _stat_totals())
+        for totals in (
+            region_stats,
+            region_stats["countries"].setdefault(country, {"stores": 0, "coupons": 0}),
+            region_stats["store_types"].setdefault(store_type, {"stores": 0, "coupons": 0}),
+            region_stats["categories"].setdefault(category, {"stores": 0, "coupons": 0}),
+        ):
+            totals["stores"] += store_count
+            totals["coupons"] += coupon_count
     
-    return {"stats": stats}
+    response = FastJSONResponse({"stats": stats}, headers=validators)
+    response_cache.set(cache_key, response, listing_tags())
+    return response
@@ -0,0 +1,288 @@
+from sqlalchemy import text, literal_column, func, or_, case, false, Float, Integer, String
+from sqlalchemy.orm import Session
+from config import settings
+from inverted_index import coupon_index
+from models_sqlite import Store, Coupon
+import re
+
+# Full-text search over coupons and stores.
+# SQLite uses FTS5 tables kept in sync by triggers, PostgreSQL uses tsvector
+# columns with GIN indexes. Databases without either fall back to ILIKE.
+# With SEARCH_BACKEND=memory coupons are searched with the in-process index
+# in inverted_index.py instead.
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# bm25 column weights: title, description, code, store_name
+COUPON_RANK_WEIGHTS = (10.0, 2.0, 5.0, 4.0)
+# bm25 column weights: name, domain
+STORE_RANK_WEIGHTS = (10.0, 3.0)
+
+# Max ranked ids taken from the in-process index per search
+MEMORY_SEARCH_LIMIT = 1000
+
+# coupons has a text primary key, so its implicit rowid is not stable (VACUUM may
+# renumber it). coupons_fts carries the coupon id for joins, and the triggers find
+# a coupon's FTS row through coupons_fts_keys, whose INTEGER PRIMARY KEY is stable.
+# The update triggers skip rows whose indexed text did not change (re-scraped coupons).
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS coupons_fts USING fts5(
+        title, description, code, store_name, coupon_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TABLE IF NOT EXISTS coupons_fts_keys (
+        rowid INTEGER PRIMARY KEY, coupon_id VARCHAR(36) NOT NULL UNIQUE
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS stores_fts USING fts5(
+        name, domain, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    "DROP TRIGGER IF EXISTS coupons_fts_insert",
+    """CREATE TRIGGER coupons_fts_insert AFTER INSERT ON coupons BEGIN
+        INSERT OR IGNORE INTO coupons_fts_keys(coupon_id) VALUES (new.id);
+        INSERT INTO coupons_fts(rowid, title, description, code, store_name, coupon_id)
+        SELECT (SELECT rowid FROM coupons_fts_keys WHERE coupon_id = new.id),
+               new.title, new.description, new.code, name, new.id
+        FROM stores WHERE id = new.store_id;
+    END""",
+    "DROP TRIGGER IF EXISTS coupons_fts_update",
+    """CREATE TRIGGER coupons_fts_update AFTER UPDATE OF id, title, description, code, store_id ON coupons
+    WHEN old.id IS NOT new.id OR old.title IS NOT new.title OR old.description IS NOT new.description
+        OR old.code IS NOT new.code OR old.store_id IS NOT new.store_id BEGIN
+        DELETE FROM coupons_fts WHERE rowid = (SELECT rowid FROM coupons_fts_keys WHERE coupon_id = old.id);
+        UPDATE coupons_fts_keys SET coupon_id = new.id WHERE coupon_id = old.id;
+        INSERT OR IGNORE INTO coupons_fts_keys(coupon_id) VALUES (new.id);
+        INSERT INTO coupons_fts(rowid, title, description, code, store_name, coupon_id)
+        SELECT (SELECT rowid FROM coupons_fts_keys WHERE coupon_id = new.id),
+               new.title, new.description, new.code, name, new.id
+        FROM stores WHERE id = new.store_id;
+    END""",
+    "DROP TRIGGER IF EXISTS coupons_fts_delete",
+    """CREATE TRIGGER coupons_fts_delete AFTER DELETE ON coupons BEGIN
+        DELETE FROM coupons_fts WHERE rowid = (SELECT rowid FROM coupons_fts_keys WHERE coupon_id = old.id);
+        DELETE FROM coupons_fts_keys WHERE coupon_id = old.id;
+    END""",
+    "DROP TRIGGER IF EXISTS stores_fts_insert",
+    """CREATE TRIGGER stores_fts_insert AFTER INSERT ON stores BEGIN
+        INSERT INTO stores_fts(rowid, name, domain) VALUES (new.id, new.name, new.domain);
+    END""",
+    "DROP TRIGGER IF EXISTS stores_fts_update",
+    """CREATE TRIGGER stores_fts_update AFTER UPDATE OF name, domain ON stores
+    WHEN old.name IS NOT new.name OR old.domain IS NOT new.domain BEGIN
+        DELETE FROM stores_fts WHERE rowid = old.id;
+        INSERT INTO stores_fts(rowid, name, domain) VALUES (new.id, new.name, new.domain);
+        UPDATE coupons_fts SET store_name = new.name
+        WHERE rowid IN (
+            SELECT coupons_fts_keys.rowid FROM coupons_fts_keys
+            JOIN coupons ON coupons.id = coupons_fts_keys.coupon_id
+            WHERE coupons.store_id = new.id
+        );
+    END""",
+    "DROP TRIGGER IF EXISTS stores_fts_delete",
+    """CREATE TRIGGER stores_fts_delete AFTER DELETE ON stores BEGIN
+        DELETE FROM stores_fts WHERE rowid = old.id;
+    END""",
+]
+
+# coupons_fts from before coupon_id was stored, keyed on coupons.rowid
+SQLITE_LEGACY_DROP = [
+    "DROP TABLE IF EXISTS coupons_fts",
+]
+
+SQLITE_REBUILD = [
+    "DELETE FROM coupons_fts",
+    "DELETE FROM coupons_fts_keys",
+    "INSERT INTO coupons_fts_keys(coupon_id) SELECT id FROM coupons",
+    """INSERT INTO coupons_fts(rowid, title, description, code, store_name, coupon_id)
+       SELECT coupons_fts_keys.rowid, coupons.title, coupons.description, coupons.code, stores.name, coupons.id
+       FROM coupons
+       JOIN coupons_fts_keys ON coupons_fts_keys.coupon_id = coupons.id
+       JOIN stores ON stores.id = coupons.store_id""",
+    "DELETE FROM stores_fts",
+    "INSERT INTO stores_fts(rowid, name, domain) SELECT id, name, domain FROM stores",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE coupons ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """ALTER TABLE stores ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(domain, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_coupons_search_vector ON coupons USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_stores_search_vector ON stores USING gin (search_vector)",
+    """CREATE OR REPLACE FUNCTION coupons_search_vector_refresh() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.code, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce((SELECT name FROM stores WHERE id = NEW.store_id), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS coupons_search_vector_trigger ON coupons",
+    """CREATE TRIGGER coupons_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description, code, store_id ON coupons
+        FOR EACH ROW EXECUTE FUNCTION coupons_search_vector_refresh()""",
+    """CREATE OR REPLACE FUNCTION stores_search_vector_propagate() RETURNS trigger AS $$
+    BEGIN
+        UPDATE coupons SET store_id = store_id WHERE store_id = NEW.id;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS stores_search_vector_trigger ON stores",
+    """CREATE TRIGGER stores_search_vector_trigger
+        AFTER UPDATE OF name ON stores
+        FOR EACH ROW EXECUTE FUNCTION stores_search_vector_propagate()""",
+]
+
+POSTGRES_REBUILD = [
+    "UPDATE coupons SET store_id = store_id WHERE search_vector IS NULL",
+]
+
+# Cache of engine -> dialect name when full-text search is installed, else None
+_search_backends = {}
+
+
+def install_search_index(engine):
+    """Create the full-text search tables, triggers and indexes if supported"""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        ddl, rebuild = SQLITE_DDL, SQLITE_REBUILD
+    elif dialect == "postgresql":
+        ddl, rebuild = POSTGRES_DDL, POSTGRES_REBUILD
+    else:
+        print(f"Full-text search not supported on {dialect}, using ILIKE search")
+        return False
+
+    try:
+        with engine.begin() as conn:
+            existed = False
+            if dialect == "sqlite":
+                coupons_fts = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE name = 'coupons_fts'")
+                ).scalar()
+                existed = coupons_fts is not None and "coupon_id" in coupons_fts
+                if coupons_fts is not None and not existed:
+                    for statement in SQLITE_LEGACY_DROP:
+                        conn.execute(text(statement))
+            for statement in ddl:
+                conn.execute(text(statement))
+            if not existed:
+                for statement in rebuild:
+                    conn.execute(text(statement))
+    except Exception as e:
+        print(f"Could not install full-text search ({e}), using ILIKE search")
+        return False
+
+    _search_backends[engine] = dialect
+    print("Full-text search index ready!")
+    return True
+
+
+def rebuild_search_index(engine):
+    """Repopulate the full-text index from the coupons and stores tables"""
+    statements = SQLITE_REBUILD if engine.dialect.name == "sqlite" else POSTGRES_REBUILD
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+
+def _search_backend(db: Session):
+    bind = db.get_bind()
+    if bind not in _search_backends:
+        if bind.dialect.name == "sqlite":
+            found = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'coupons_fts'")
+            ).first()
+        elif bind.dialect.name == "postgresql":
+            found = db.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'coupons' AND column_name = 'search_vector'"
+            )).first()
+        else:
+            found = None
+        _search_backends[bind] = bind.dialect.name if found else None
+    return _search_backends[bind]
+
+
+def search_terms(search: str):
+    """Split user input into lowercase terms"""
+    return [term.lower() for term in TOKEN_PATTERN.findall(search)]
+
+
+def fts5_query(terms) -> str:
+    """Build an FTS5 query that prefix-matches every term"""
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def tsquery(terms) -> str:
+    """Build a to_tsquery expression that prefix-matches every term"""
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_coupons(db: Session, query, search: str):
+    """
+    Restrict a Coupon query (already joined to Store) to matches for search,
+    ordered by relevance. Returns (query, capped); capped is True when the
+    in-process index matched more than MEMORY_SEARCH_LIMIT coupons and only
+    the best ranked ones are kept.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return query, False
+
+    if settings.SEARCH_BACKEND == "memory":
+        coupon_index.sync_if_stale(db, settings.SEARCH_INDEX_REFRESH_SECONDS)
+        coupon_ids = coupon_index.search(search, limit=MEMORY_SEARCH_LIMIT + 1)
+        capped = len(coupon_ids) > MEMORY_SEARCH_LIMIT
+        coupon_ids = coupon_ids[:MEMORY_SEARCH_LIMIT]
+        if not coupon_ids:
+            return query.filter(false()), False
+        positions = {coupon_id: position for position, coupon_id in enumerate(coupon_ids)}
+        return query.filter(Coupon.id.in_(coupon_ids)).order_by(case(positions, value=Coupon.id)), capped
+
+    backend = _search_backend(db)
+    if backend == "sqlite":
+        weights = ", ".join(str(weight) for weight in COUPON_RANK_WEIGHTS)
+        matches = text(
+            f"SELECT coupon_id, bm25(coupons_fts, {weights}) AS rank "
+            "FROM coupons_fts WHERE coupons_fts MATCH :match"
+        ).bindparams(match=fts5_query(terms)).columns(coupon_id=String, rank=Float).subquery()
+        # bm25 scores are negative, best match first
+        return query.join(matches, matches.c.coupon_id == Coupon.id).order_by(matches.c.rank), False
+
+    if backend == "postgresql":
+        ts_query = func.to_tsquery("simple", tsquery(terms))
+        vector = literal_column("coupons.search_vector")
+        return query.filter(vector.op("@@")(ts_query)).order_by(func.ts_rank(vector, ts_query).desc()), False
+
+    pattern = f"%{search}%"
+    return query.filter(or_(
+        Coupon.title.ilike(pattern),
+        Coupon.description.ilike(pattern),
+        Coupon.code.ilike(pattern),
+        Store.name.ilike(pattern)
+    )), False
+
+
+def search_stores(db: Session, query, search: str):
+    """Restrict a Store query to matches for search, ordered by relevance"""
+    terms = search_terms(search)
+    if not terms:
+        return query
+
+    backend = _search_backend(db)
+    if backend == "sqlite":
+        weights = ", ".join(str(weight) for weight in STORE_RANK_WEIGHTS)
+        matches = text(
+            f"SELECT rowid, bm25(stores_fts, {weights}) AS rank "
+            "FROM stores_fts WHERE stores_fts MATCH :match"
+        ).bindparams(match=fts5_query(terms)).columns(rowid=Integer, rank=Float).subquery()
+        return query.join(matches, matches.c.rowid == Store.id).order_by(matches.c.rank)
+
+    if backend == "postgresql":
+        ts_query = func.to_tsquery("simple", tsquery(terms))
+        vector = literal_column("stores.search_vector")
+        return query.filter(vector.op("@@")(ts_query)).order_by(func.ts_rank(vector, ts_query).desc())
+
+    return query.filter(Store.name.ilike(f"%{search}%"))
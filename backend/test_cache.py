@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the response cache: LRU/TTL/tag behaviour and endpoint hits
+"""
+import time
+
+import pytest
+from sqlalchemy import event
+
+from cache import MemoryBackend, listing_tags, response_cache, store_tag
+from models_sqlite import Store, Coupon
+
+
+@pytest.fixture(scope="module")
+def cache_backend():
+    return MemoryBackend(max_entries=64)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seed(session_factory):
+    db = session_factory()
+    store = Store(name="Cached Store", slug="cached-store", domain="cached.example.com",
+                  region="europe", country="DE", active_coupon_count=1)
+    db.add(store)
+    db.flush()
+    db.add(Coupon(store_id=store.id, code="CACHE10", title="10% off"))
+    db.commit()
+    db.close()
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", b"1", [], ttl=60)
+    backend.set("b", b"2", [], ttl=60)
+    backend.get("a")
+    backend.set("c", b"3", [], ttl=60)
+    assert backend.get("a") == b"1"
+    assert backend.get("b") is None
+    assert backend.get("c") == b"3"
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", b"1", [], ttl=0)
+    time.sleep(0.01)
+    assert backend.get("a") is None
+
+
+def test_memory_backend_invalidates_by_tag():
+    backend = MemoryBackend(max_entries=8)
+    backend.set("store", b"1", [store_tag("nike")], ttl=60)
+    backend.set("region", b"2", listing_tags(region="america"), ttl=60)
+    backend.set("all", b"3", listing_tags(), ttl=60)
+    assert backend.invalidate(["region:america"]) == 2
+    assert backend.get("store") == b"1"
+    assert backend.get("region") is None
+    assert backend.get("all") is None
+
+
+def test_cached_listing_skips_database(client, engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    first = client.get("/api/v1/coupons/?region=europe&limit=5")
+    assert first.status_code == 200
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        # Same params in a different order share the cache entry
+        second = client.get("/api/v1/coupons/?limit=5&region=europe")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert statements == []
+
+
+def test_invalidation_drops_cached_listing(client):
+    client.get("/api/v1/stores/?region=europe")
+    key = "/api/v1/stores/?region=europe"
+    assert response_cache.get(key) is not None
+    response_cache.invalidate(["region:europe"])
+    assert response_cache.get(key) is None
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for ETag / Last-Modified revalidation on the public read endpoints
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from cache import MemoryBackend, response_cache
+from models_sqlite import Store, Coupon
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seed(session_factory):
+    db = session_factory()
+    store = Store(name="Etag Store", slug="etag-store", domain="etag.example.com", region="asia",
+                  country="SG", active_coupon_count=1, last_scraped_at=datetime(2024, 5, 1, 12, 0, 0))
+    db.add(store)
+    db.flush()
+    db.add(Coupon(store_id=store.id, code="ETAG5", title="5% off", scraped_at=datetime(2024, 5, 1, 12, 0, 0)))
+    db.commit()
+    db.close()
+
+
+def count_statements(client, engine, url, headers):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return response, statements
+
+
+def test_listing_revalidates_with_etag(client, engine):
+    first = client.get("/api/v1/coupons/?region=asia")
+    assert first.status_code == 200
+    assert first.headers["etag"].startswith('W/"')
+    assert "last-modified" not in first.headers
+    assert "s-maxage=" in first.headers["cache-control"]
+
+    # Only the watermark query runs; the page is neither queried nor serialized
+    second, statements = count_statements(client, engine, "/api/v1/coupons/?region=asia", {"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == first.headers["etag"]
+    assert len(statements) == 1
+
+
+def test_etag_changes_with_params_and_data(client, session_factory):
+    asia = client.get("/api/v1/stores/?region=asia").headers["etag"]
+    europe = client.get("/api/v1/stores/?region=europe").headers["etag"]
+    assert asia != europe
+
+    db = session_factory()
+    store = db.query(Store).filter(Store.slug == "etag-store").one()
+    store.last_scraped_at = datetime(2024, 5, 2, 12, 0, 0)
+    db.commit()
+    db.close()
+
+    response = client.get("/api/v1/stores/?region=asia", headers={"If-None-Match": asia})
+    assert response.status_code == 200
+    assert response.headers["etag"] != asia
+
+
+def test_if_modified_since(client, session_factory):
+    db = session_factory()
+    coupon_id = db.query(Coupon.id).filter(Coupon.code == "ETAG5").scalar()
+    db.close()
+
+    url = f"/api/v1/coupons/{coupon_id}"
+    response = client.get(url, headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 304
+    response = client.get(url, headers={"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+    assert response.status_code == 200
+    assert response.json()["coupon"]["code"] == "ETAG5"
+
+
+def test_listing_ignores_if_modified_since(client, session_factory):
+    """A store joining the listing does not move max(last_scraped_at); only the ETag can tell"""
+    first = client.get("/api/v1/stores/?region=asia")
+    db = session_factory()
+    db.add(Store(name="New Store", slug="new-store", domain="new.example.com", region="asia", country="SG"))
+    db.commit()
+    db.close()
+    try:
+        response = client.get("/api/v1/stores/?region=asia", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        assert response.status_code == 200
+        assert "new-store" in [store["slug"] for store in response.json()["stores"]]
+        response = client.get("/api/v1/stores/?region=asia", headers={"If-None-Match": first.headers["etag"]})
+        assert response.status_code == 200
+    finally:
+        db = session_factory()
+        db.query(Store).filter(Store.slug == "new-store").delete()
+        db.commit()
+        db.close()
+
+
+def test_cached_response_answers_304(client, engine):
+    response_cache.backend = MemoryBackend(max_entries=8)
+    try:
+        first = client.get("/api/v1/stores/regions/stats")
+        second, statements = count_statements(client, engine, "/api/v1/stores/regions/stats", {"If-None-Match": first.headers["etag"]})
+    finally:
+        response_cache.backend = None
+    assert second.status_code == 304
+    assert statements == []
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Query-count regression tests for GlobalCouponFinder API endpoints
+Runs against an in-memory SQLite database, no server required
+"""
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from pagination import keyset_paginate
+from models_sqlite import Store, Coupon, RegionStat
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seed(session_factory):
+    seed_data(session_factory, store_count=60, coupons_per_store=3)
+
+
+def seed_data(session_factory, store_count: int, coupons_per_store: int):
+    db = session_factory()
+    for i in range(store_count):
+        store = Store(
+            name=f"Store {i}",
+            slug=f"store-{i}",
+            domain=f"store{i}.example.com",
+            region="america",
+            country="US",
+            store_type="retail",
+            category="general",
+            active_coupon_count=coupons_per_store - 1
+        )
+        db.add(store)
+        db.flush()
+        for j in range(coupons_per_store):
+            db.add(Coupon(
+                store_id=store.id,
+                code=f"SAVE{i}X{j}",
+                title=f"Save {j + 10}% at Store {i}",
+                is_active=j != 0
+            ))
+    db.commit()
+    db.close()
+
+
+@contextmanager
+def count_queries(engine):
+    """Count SQL statements emitted against the test engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+
+def test_store_listing_query_count_is_constant(client, engine):
+    """GET /api/v1/stores must not issue one query per store"""
+    counts = {}
+    for limit in (5, 50):
+        with count_queries(engine) as statements:
+            response = client.get(f"/api/v1/stores/?limit={limit}")
+        assert response.status_code == 200
+        assert len(response.json()["stores"]) == limit
+        counts[limit] = len(statements)
+
+    assert counts[5] == counts[50]
+
+
+def test_store_listing_active_coupon_counts(client):
+    response = client.get("/api/v1/stores/?limit=3")
+    assert response.status_code == 200
+    for store in response.json()["stores"]:
+        assert store["active_coupons_count"] == 2
+
+
+def test_store_listing_cursor_walk(client, engine):
+    """Cursor pages cover every store once and skip the COUNT query"""
+    seen = []
+    response = client.get("/api/v1/stores/?limit=25")
+    data = response.json()
+    seen.extend(store["id"] for store in data["stores"])
+
+    while data["next_cursor"]:
+        with count_queries(engine) as statements:
+            response = client.get(f"/api/v1/stores/?limit=25&cursor={data['next_cursor']}")
+        assert response.status_code == 200
+        assert not any("count(" in statement.lower() for statement in statements)
+        data = response.json()
+        assert data["total"] is None
+        seen.extend(store["id"] for store in data["stores"])
+
+    assert len(seen) == len(set(seen)) == 60
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/v1/stores/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_cursor_walk_with_null_created_at(session_factory):
+    """Rows without created_at sort as the oldest and are paged like any other"""
+    db = session_factory()
+    null_ids = [store.id for store in db.query(Store).filter(Store.id % 7 == 0)]
+    db.query(Store).filter(Store.id.in_(null_ids)).update({"created_at": None}, synchronize_session=False)
+    db.commit()
+    try:
+        for descending in (True, False):
+            seen, cursor = [], None
+            while True:
+                query = db.query(Store).filter(Store.is_active == True)
+                rows, cursor = keyset_paginate(query, Store.created_at, Store.id, 7,
+                                               cursor=cursor, descending=descending)
+                seen.extend(store.id for store in rows)
+                if not cursor:
+                    break
+            assert len(seen) == len(set(seen)) == 60
+            nulls = [store_id for store_id in seen if store_id in null_ids]
+            assert nulls == (sorted(null_ids, reverse=True) if descending else sorted(null_ids))
+            assert seen[-len(nulls):] == nulls if descending else seen[:len(nulls)] == nulls
+    finally:
+        db.query(Store).filter(Store.id.in_(null_ids)).update({"created_at": datetime.utcnow()},
+                                                              synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_coupon_listing_is_one_page_query(client, engine):
+    """GET /api/v1/coupons must not lazy-load Store per coupon (plus the ETag watermark query)"""
+    for limit in (5, 50):
+        with count_queries(engine) as statements:
+            response = client.get(f"/api/v1/coupons/?limit={limit}&include_total=false")
+        assert response.status_code == 200
+        coupons_data = response.json()["coupons"]
+        assert len(coupons_data) == limit
+        assert all(coupon["store_slug"].startswith("store-") for coupon in coupons_data)
+        assert len(statements) == 2
+
+
+def test_single_coupon_and_click_are_one_query(client, engine):
+    coupon_id = client.get("/api/v1/coupons/?limit=1").json()["coupons"][0]["id"]
+
+    with count_queries(engine) as statements:
+        response = client.get(f"/api/v1/coupons/{coupon_id}")
+    assert response.status_code == 200
+    assert response.json()["coupon"]["store_name"].startswith("Store ")
+    assert len(statements) == 1
+
+    with count_queries(engine) as statements:
+        response = client.post(f"/api/v1/coupons/{coupon_id}/click")
+    assert response.status_code == 200
+    assert response.json()["affiliate_url"].endswith(".example.com")
+    assert len(statements) == 1
+
+
+def test_region_stats_read_summary_table(client, engine, session_factory):
+    # Before the scrapers build region_stats the endpoint aggregates the stores
+    with count_queries(engine) as statements:
+        response = client.get("/api/v1/stores/regions/stats")
+    assert response.status_code == 200
+    america = response.json()["stats"]["america"]
+    assert (america["stores"], america["coupons"]) == (60, 120)
+    assert america["countries"]["US"] == {"stores": 60, "coupons": 120}
+    assert len(statements) == 2
+
+    db = session_factory()
+    db.add(RegionStat(region="america", country="US", store_type="retail", category="general",
+                      store_count=60, coupon_count=150))
+    db.commit()
+    try:
+        with count_queries(engine) as statements:
+            response = client.get("/api/v1/stores/regions/stats")
+        stats = response.json()["stats"]
+        assert len(statements) == 1
+        assert stats["america"]["store_types"]["retail"] == {"stores": 60, "coupons": 150}
+        assert (stats["europe"]["stores"], stats["europe"]["coupons"]) == (0, 0)
+
+        # A store the table does not cover yet: serve live totals instead of a partial table
+        db.add(Store(name="Asia Store", slug="asia-store", domain="asia.example.com", region="asia",
+                     country="SG", store_type="food_delivery", active_coupon_count=7))
+        db.commit()
+        response = client.get("/api/v1/stores/regions/stats")
+        stats = response.json()["stats"]
+        assert stats["asia"]["store_types"]["food_delivery"] == {"stores": 1, "coupons": 7}
+        assert stats["america"]["store_types"]["retail"] == {"stores": 60, "coupons": 120}
+    finally:
+        db.query(RegionStat).delete()
+        db.query(Store).filter(Store.slug == "asia-store").delete()
+        db.commit()
+        db.close()
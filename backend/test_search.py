@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Full-text search tests for GlobalCouponFinder
+Runs against an in-memory SQLite database with FTS5
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from models_sqlite import Store, Coupon
+from search import install_search_index, search_coupons, search_stores
+from inverted_index import CouponIndex
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seed(engine, session_factory):
+    assert install_search_index(engine)
+
+    db = session_factory()
+    nike = Store(name="Nike", slug="nike", domain="nike.com", region="america", country="US")
+    zalando = Store(name="Zalando", slug="zalando", domain="zalando.de", region="europe", country="DE")
+    db.add_all([nike, zalando])
+    db.flush()
+    db.add_all([
+        Coupon(store_id=nike.id, code="RUNNING20", title="20% off running shoes"),
+        Coupon(store_id=nike.id, code="FREESHIP", title="Free shipping", description="On all shoes orders"),
+        Coupon(store_id=zalando.id, code="WINTER10", title="10% off winter jackets"),
+    ])
+    db.commit()
+    db.close()
+
+
+def coupon_codes(session_factory, search):
+    db = session_factory()
+    try:
+        query = db.query(Coupon).join(Store)
+        query, _ = search_coupons(db, query, search)
+        return [coupon.code for coupon in query.all()]
+    finally:
+        db.close()
+
+
+def test_prefix_match_across_columns(session_factory):
+    assert set(coupon_codes(session_factory, "sho")) == {"RUNNING20", "FREESHIP"}
+    assert coupon_codes(session_factory, "winter10") == ["WINTER10"]
+    assert set(coupon_codes(session_factory, "zaland")) == {"WINTER10"}
+
+
+def test_title_matches_rank_above_description(session_factory):
+    assert coupon_codes(session_factory, "shoes") == ["RUNNING20", "FREESHIP"]
+
+
+def test_index_follows_updates(session_factory):
+    db = session_factory()
+    coupon = db.query(Coupon).filter(Coupon.code == "WINTER10").first()
+    coupon.title = "10% off summer dresses"
+    db.query(Store).filter(Store.slug == "zalando").update({"name": "Zalando Lounge"})
+    db.commit()
+    db.close()
+
+    assert coupon_codes(session_factory, "winter jackets") == []
+    assert coupon_codes(session_factory, "summer") == ["WINTER10"]
+    assert coupon_codes(session_factory, "lounge") == ["WINTER10"]
+
+
+def test_unchanged_rows_skip_the_index(session_factory):
+    """Upserts rewrite every scraped coupon; only real text changes may touch the FTS tables"""
+    db = session_factory()
+    try:
+        changes = db.execute(text("SELECT total_changes()")).scalar()
+        db.execute(text("UPDATE coupons SET title = title, code = code WHERE code = 'RUNNING20'"))
+        db.execute(text("UPDATE stores SET name = name WHERE slug = 'nike'"))
+        assert db.execute(text("SELECT total_changes()")).scalar() - changes == 2
+        db.rollback()
+    finally:
+        db.close()
+
+
+def test_store_search(session_factory):
+    db = session_factory()
+    try:
+        stores = search_stores(db, db.query(Store), "nik").all()
+        assert [store.slug for store in stores] == ["nike"]
+    finally:
+        db.close()
+
+
+def test_memory_index_ranking_and_prefix():
+    index = CouponIndex()
+    index.add("a", "20% off running shoes", None, "RUN20", "Nike")
+    index.add("b", "Free shipping", "On all shoes orders", "FREESHIP", "Nike")
+    index.add("c", "10% off jackets", None, "WINTER10", "Zalando")
+
+    assert index.search("shoes") == ["a", "b"]
+    assert index.search("sho nik") == ["a", "b"]
+    assert index.search("zal") == ["c"]
+    assert index.search("shoes zalando") == []
+
+
+def test_memory_index_updates_and_compaction():
+    index = CouponIndex()
+    for i in range(10):
+        index.add(str(i), f"Deal {i}", None, f"CODE{i}", "Store")
+    for i in range(5):
+        index.remove(str(i))
+    index.add("9", "Summer sale", None, "CODE9", "Store")
+
+    assert len(index) == 5
+    assert index.search("summer") == ["9"]
+    assert "9" not in index.search("deal")
+    assert sorted(index.search("deal")) == ["5", "6", "7", "8"]
+
+
+def test_memory_index_load_and_sync(session_factory):
+    index = CouponIndex()
+    db = session_factory()
+    try:
+        index.load(db)
+        nike_coupons = db.query(Coupon).join(Store).filter(Store.slug == "nike").all()
+        assert set(index.search("nike")) == {coupon.id for coupon in nike_coupons}
+
+        # Bulk deactivation, as cleanup_expired_coupons does, keeps scraped_at
+        freeship = db.query(Coupon).filter(Coupon.code == "FREESHIP").first()
+        db.query(Coupon).filter(Coupon.id == freeship.id).update(
+            {"is_active": False, "updated_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+        index.sync(db)
+        assert index.search("nike") == [coupon.id for coupon in nike_coupons if coupon.code == "RUNNING20"]
+
+        # Renaming a store reindexes its coupons
+        db.query(Store).filter(Store.slug == "nike").update({"name": "Nike Outlet"})
+        db.commit()
+        index.sync(db)
+        assert index.search("outlet") == index.search("running")
+        assert len(index.search("outlet")) == 1
+
+        # Rows re-read within SYNC_OVERLAP are not re-added
+        documents = len(index._doc_keys)
+        for _ in range(3):
+            index.sync(db)
+        assert len(index._doc_keys) == documents
+    finally:
+        db.query(Store).filter(Store.slug == "nike").update({"name": "Nike"})
+        db.query(Coupon).filter(Coupon.code == "FREESHIP").update({"is_active": True})
+        db.commit()
+        db.close()
+
+
+def test_index_survives_rowid_renumbering(session_factory):
+    """VACUUM or a table rebuild may renumber coupons.rowid; matches must still map to the right coupons"""
+    db = session_factory()
+    try:
+        db.execute(text("UPDATE coupons SET rowid = rowid + 1000"))
+        db.commit()
+        assert coupon_codes(session_factory, "running") == ["RUNNING20"]
+        assert coupon_codes(session_factory, "freeship") == ["FREESHIP"]
+    finally:
+        db.execute(text("UPDATE coupons SET rowid = rowid - 1000"))
+        db.commit()
+        db.close()
+
+
+def test_memory_search_reports_cap(session_factory, monkeypatch):
+    """Matches beyond MEMORY_SEARCH_LIMIT are dropped, and the caller is told so"""
+    import search
+    from config import settings
+    from inverted_index import coupon_index
+
+    monkeypatch.setattr(search, "MEMORY_SEARCH_LIMIT", 1)
+    monkeypatch.setattr(settings, "SEARCH_BACKEND", "memory")
+    db = session_factory()
+    try:
+        coupon_index.load(db)
+        query, capped = search_coupons(db, db.query(Coupon).join(Store), "nike")
+        assert capped and query.count() == 1
+        query, capped = search_coupons(db, db.query(Coupon).join(Store), "winter10")
+        assert not capped and query.count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,99 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from base_scraper import proxy_url
+from config import settings
+from rate_limit import host_limiter
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); fall back to HTTP/1.1 without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class AsyncFetcher:
+    """
+    asyncio HTTP client shared by every static store in a batch.
+    One keep-alive connection pool; at most MAX_CONCURRENT_SCRAPERS requests in
+    flight overall and MAX_CONNECTIONS_PER_HOST against any one host.
+
+    Usage:
+        async with AsyncFetcher() as fetcher:
+            response = await fetcher.fetch(url, headers)
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, per_host: Optional[int] = None, limiter=None):
+        self.concurrency = concurrency or settings.MAX_CONCURRENT_SCRAPERS
+        self.per_host = per_host or settings.MAX_CONNECTIONS_PER_HOST
+        self.limiter = limiter or host_limiter
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self):
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        # A mounted transport routes through the proxy; AsyncClient(proxies=) is gone in httpx 0.28
+        proxy = proxy_url()
+        mounts = None
+        if proxy:
+            mounts = {"all://": httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, limits=limits, proxy=httpx.Proxy(proxy))}
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=settings.REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=limits,
+            mounts=mounts,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+        self._client = None
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return self._host_slots[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict] = None, metrics: Optional[Dict] = None) -> httpx.Response:
+        """
+        GET with the same rate limit and retry policy as BaseScraper.make_request.
+        Wait and fetch times are added to metrics (a scraper's metrics dict) if given.
+        """
+        metrics = metrics if metrics is not None else {'requests': 0, 'wait_seconds': 0.0, 'fetch_seconds': 0.0, 'bytes': 0}
+        for attempt in range(settings.RETRY_ATTEMPTS):
+            try:
+                # Wait for the host's token, then its connection slot, and only then a
+                # global slot, so requests queued on a busy host do not hold slots other hosts need
+                metrics['wait_seconds'] += await self.limiter.wait_async(url)
+                async with self._host_slot(url), self._slots:
+                    logger.info(f"Request to {url} (attempt {attempt + 1})")
+                    started = time.perf_counter()
+                    metrics['requests'] += 1
+                    response = await self._client.get(url, headers=headers)
+                    metrics['fetch_seconds'] += time.perf_counter() - started
+                    metrics['bytes'] += len(response.content)
+                    # 304 answers a conditional request: the caller's copy is current
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                    return response
+
+            except httpx.HTTPError as e:
+                logger.warning(f"Request failed (attempt {attempt + 1}): {e}")
+
+                if attempt < settings.RETRY_ATTEMPTS - 1:
+                    # Back off without holding a slot
+                    await asyncio.sleep(random.uniform(2, 5))
+                else:
+                    raise
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark JavaScriptCouponScraper throughput (stores/minute) with a fresh
+Chromium per store, as before the browser pool, and with the shared pool.
+Pages are served from a local server that renders the coupons with JS.
+
+Usage: python bench_browser_pool.py [--stores 20]
+Set BROWSER_EXECUTABLE_PATH to benchmark an installed Chrome.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Every store is on 127.0.0.1: lift the per-host rate limit so only browser cost is measured
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+os.environ.setdefault("REQUESTS_PER_SECOND_PER_HOST", "1000")
+os.environ.setdefault("HOST_REQUEST_BURST", "1000")
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from browser_pool import BrowserPool
+from javascript_scraper import JavaScriptCouponScraper
+
+PAGE = b"""<html><body><div id="coupons"></div><script>
+const coupons = document.getElementById('coupons');
+for (let i = 0; i < 20; i++) {
+    coupons.insertAdjacentHTML('beforeend',
+        `<div class="coupon"><span class="code">SAVE${i}</span><h3>${i}% off</h3>` +
+        `<p>Sitewide</p><span class="expiry">Expires 12/31/2030</span></div>`);
+}
+</script></body></html>"""
+
+SELECTORS = {
+    'coupon_container': '.coupon',
+    'code': '.code',
+    'title': 'h3',
+    'description': 'p',
+    'expiry': '.expiry',
+    'discount': 'h3',
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(pool: BrowserPool, url: str, store_count: int) -> float:
+    """Scrape store_count stores one after another; returns stores/minute"""
+    started = time.perf_counter()
+    for i in range(store_count):
+        store = {
+            'name': f'Store {i}',
+            'domain': '127.0.0.1',
+            'scraper_config': {'type': 'javascript', 'coupon_list_url': url, 'selectors': SELECTORS},
+        }
+        coupons = JavaScriptCouponScraper(store, pool=pool).scrape()
+        assert len(coupons) == 20, len(coupons)
+    elapsed = time.perf_counter() - started
+    pool.close()
+    return store_count / elapsed * 60
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=20)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/coupons"
+
+    try:
+        # max_pages=1 relaunches Chromium for every store, like the old per-scrape launch
+        fresh = BrowserPool(max_pages=1)
+        before = run(fresh, url, args.stores)
+        pooled = BrowserPool(max_pages=args.stores + 1)
+        after = run(pooled, url, args.stores)
+    finally:
+        server.shutdown()
+
+    print(f"\n{'mode':<20} {'stores/min':>10} {'launches':>9}")
+    print(f"{'browser per store':<20} {before:>10.1f} {fresh.launches:>9}")
+    print(f"{'shared pool':<20} {after:>10.1f} {pooled.launches:>9}")
+    print(f"\nspeedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
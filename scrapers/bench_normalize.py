@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark expiry date and discount normalization over a corpus of coupon-page
+strings: the previous per-call regex/dateutil implementation against
+normalize.py (compiled patterns + LRU memo), cold and warm.
+
+Usage: python bench_normalize.py [--strings 20000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import normalize
+
+EXPIRY_TEMPLATES = [
+    "Expires {m}/{d}/{y}", "Valid until {m}/{d}/{y}", "Ends {y}-{m:02d}-{d:02d}",
+    "Expires {month} {d}, {y}", "Offer ends {d} {month} {y}", "Exp. {m}-{d}-{y}",
+]
+DISCOUNT_TEMPLATES = [
+    "{n}% OFF", "Save {n}%", "${n} off orders over $50", "Up to {n}% off sitewide",
+    "£{n} off", "Extra {n}% discount", "Get ${n}.99 back", "Free shipping",
+]
+MONTHS = ["January", "March", "June", "September", "December"]
+
+
+def build_corpus(count: int, seed: int = 42):
+    """Strings as coupon pages repeat them: a few hundred distinct values, many times over"""
+    rng = random.Random(seed)
+    expiries = [
+        rng.choice(EXPIRY_TEMPLATES).format(m=rng.randint(1, 12), d=rng.randint(1, 28), y=rng.choice([2026, 2027]),
+                                            month=rng.choice(MONTHS))
+        for _ in range(300)
+    ]
+    discounts = [rng.choice(DISCOUNT_TEMPLATES).format(n=rng.choice([5, 10, 15, 20, 25, 30, 40, 50])) for _ in range(60)]
+    return [rng.choice(expiries) for _ in range(count)], [rng.choice(discounts) for _ in range(count)]
+
+
+def legacy_parse_expiry_date(date_string: str):
+    """BaseScraper.parse_expiry_date before normalize.py"""
+    if not date_string:
+        return None
+    from dateutil import parser
+    date_string = date_string.strip()
+    patterns = [
+        (r'(\d{1,2})/(\d{1,2})/(\d{4})', '%m/%d/%Y'),
+        (r'(\d{1,2})-(\d{1,2})-(\d{4})', '%m-%d-%Y'),
+        (r'(\d{4})-(\d{1,2})-(\d{1,2})', '%Y-%m-%d'),
+    ]
+    for pattern, fmt in patterns:
+        match = re.search(pattern, date_string)
+        if match:
+            try:
+                return datetime.strptime(match.group(0), fmt)
+            except:
+                pass
+    try:
+        return parser.parse(date_string)
+    except:
+        return None
+
+
+def legacy_parse_discount(discount_string: str):
+    """BaseScraper.parse_discount before normalize.py"""
+    if not discount_string:
+        return None, None
+    percentage_match = re.search(r'(\d+(?:\.\d+)?)\s*%', discount_string)
+    if percentage_match:
+        return float(percentage_match.group(1)), 'percentage'
+    amount_match = re.search(r'\$(\d+(?:\.\d+)?)', discount_string)
+    if amount_match:
+        return float(amount_match.group(1)), 'fixed'
+    number_match = re.search(r'(\d+(?:\.\d+)?)', discount_string)
+    if number_match:
+        return float(number_match.group(1)), None
+    return None, None
+
+
+def measure(run, repeat: int, before=None):
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def clear_memo():
+    normalize.parse_expiry_date.cache_clear()
+    normalize.parse_discount.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strings", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    expiries, discounts = build_corpus(args.strings)
+
+    def legacy():
+        for text in expiries:
+            legacy_parse_expiry_date(text)
+        for text in discounts:
+            legacy_parse_discount(text)
+
+    def current():
+        normalize.parse_expiry_dates(expiries, 'MDY')
+        normalize.parse_discounts(discounts)
+
+    results = [
+        ("previous", measure(legacy, args.repeat)),
+        ("normalize (cold memo)", measure(current, args.repeat, before=clear_memo)),
+        ("normalize (warm memo)", measure(current, args.repeat)),
+    ]
+    parsed = sum(date is not None for date in normalize.parse_expiry_dates(expiries, 'MDY'))
+    legacy_parsed = sum(legacy_parse_expiry_date(text) is not None for text in expiries)
+
+    print(f"\n{args.strings:,} expiry strings + {args.strings:,} discount strings")
+    print(f"dates parsed: previous {legacy_parsed:,}, normalize {parsed:,}")
+    print(f"\n{'implementation':<24} {'total':>10} {'per string':>12}")
+    for name, elapsed in results:
+        print(f"{name:<24} {elapsed * 1000:>7.1f} ms {elapsed / (2 * args.strings) * 1e6:>9.2f} µs")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)
+    main()
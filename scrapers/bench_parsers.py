@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark parse+extract time per coupon page for each HTML parser,
+with and without parse_only scoping. Runs over generated retail-style pages
+(navigation, product grid, inline scripts, coupon list) or over saved pages
+passed with --fixture, which must use the selectors below.
+
+Usage: python bench_parsers.py [--coupons 60] [--products 400] [--repeat 20] [--fixture page.html ...]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generic_scraper import GenericCouponScraper
+from html_parsers import PARSERS, resolve_parser
+
+SELECTORS = {
+    'coupon_container': 'li.coupon',
+    'code': '.coupon-code',
+    'title': 'h3',
+    'description': '.details',
+    'expiry': '.expiry',
+    'discount': '.badge',
+}
+
+
+def build_page(coupon_count: int, product_count: int, seed: int = 42) -> bytes:
+    """A retail page where the coupons are a small part of the markup"""
+    rng = random.Random(seed)
+    nav = "".join(f'<li><a href="/c/{i}">Category {i}</a><ul>{"<li><a href=#>Sub</a></li>" * 8}</ul></li>' for i in range(30))
+    products = "".join(
+        f'<div class="product" data-sku="{i}"><a href="/p/{i}"><img src="/img/{i}.jpg" alt="Product {i}">'
+        f'<span class="name">Product {i}</span></a><span class="price">${rng.randint(5, 500)}.99</span>'
+        f'<button class="add">Add to cart</button></div>'
+        for i in range(product_count)
+    )
+    coupons = "".join(
+        f'<li class="coupon"><span class="badge">{rng.choice([10, 15, 20, 25])}% OFF</span>'
+        f'<h3>Save on order {i}</h3><p class="details">Valid on full-price items. Exclusions apply.</p>'
+        f'<span class="coupon-code">SAVE{i:04d}</span><span class="expiry">Expires 12/31/2026</span></li>'
+        for i in range(coupon_count)
+    )
+    script = "<script>window.__STATE__ = " + "{" + ",".join(f'"k{i}": {i}' for i in range(2000)) + "};</script>"
+    return (
+        f'<html><head><title>Deals</title>{script}</head><body><nav><ul>{nav}</ul></nav>'
+        f'<main><section class="grid">{products}</section>'
+        f'<section id="coupons"><ul class="coupon-list">{coupons}</ul></section></main>'
+        f'<footer>{"<p>Footer text</p>" * 50}</footer></body></html>'
+    ).encode()
+
+
+def measure(scraper: GenericCouponScraper, page: bytes, repeat: int):
+    coupons = scraper.parse_coupons(page)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        scraper.parse_coupons(page)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), coupons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coupons", type=int, default=60)
+    parser.add_argument("--products", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fixture", action="append", default=[])
+    args = parser.parse_args()
+
+    pages = {os.path.basename(path): open(path, "rb").read() for path in args.fixture}
+    if not pages:
+        pages["generated"] = build_page(args.coupons, args.products)
+
+    variants = [(name, parse_only) for name in PARSERS for parse_only in (None, True)
+                if resolve_parser(name) == name and not (name == 'selectolax' and parse_only)]
+
+    for page_name, page in pages.items():
+        print(f"\n{page_name}: {len(page) / 1024:.0f} KB")
+        print(f"{'parser':<14} {'parse_only':<11} {'per page':>10} {'coupons':>8}")
+        baseline = None
+        for name, parse_only in variants:
+            config = {'parser': name, 'selectors': SELECTORS}
+            if parse_only:
+                config['parse_only'] = parse_only
+            scraper = GenericCouponScraper({'name': 'Bench', 'domain': 'bench.example', 'scraper_config': config})
+            elapsed, coupons = measure(scraper, page, args.repeat)
+            codes = [coupon['code'] for coupon in coupons]
+            baseline = codes if baseline is None else baseline
+            assert codes == baseline, f"{name} found different coupons"
+            print(f"{name:<14} {'yes' if parse_only else 'no':<11} {elapsed * 1000:>7.2f} ms {len(codes):>8}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
@@ -0,0 +1,117 @@
+import importlib.util
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from playwright.sync_api import sync_playwright
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Browser memory is measured with psutil when installed; without it only the page limit recycles
+PSUTIL_AVAILABLE = importlib.util.find_spec("psutil") is not None
+
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+]
+
+
+class BrowserPool:
+    """
+    One Chromium kept alive per worker process and shared by every browser scrape.
+    Each scrape gets its own BrowserContext (cookies, cache and storage are not
+    shared); the browser is relaunched after max_pages contexts or once the
+    worker's browser processes use more than max_memory_mb.
+
+    Usage:
+        with browser_pool.context(user_agent=ua) as context:
+            page = context.new_page()
+    """
+
+    def __init__(self, max_pages: Optional[int] = None, max_memory_mb: Optional[int] = None):
+        self.max_pages = max_pages or settings.BROWSER_MAX_PAGES
+        self.max_memory_mb = max_memory_mb or settings.BROWSER_MAX_MEMORY_MB
+        self.pages_served = 0
+        self.launches = 0
+        self._playwright = None
+        self._browser = None
+        # Playwright's sync API is bound to the thread that started it, and keeps an event
+        # loop running there: asyncio work in this worker goes through tasks.run_in_own_loop
+        self._lock = threading.Lock()
+
+    def browser(self):
+        if self._browser is None or not self._browser.is_connected():
+            if self._playwright is None:
+                self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(
+                headless=settings.HEADLESS,
+                args=BROWSER_ARGS,
+                executable_path=settings.BROWSER_EXECUTABLE_PATH,
+            )
+            self.pages_served = 0
+            self.launches += 1
+            logger.info(f"Launched browser #{self.launches}")
+        return self._browser
+
+    @contextmanager
+    def context(self, **options):
+        """An isolated BrowserContext on the shared browser, closed on exit"""
+        with self._lock:
+            context = self.browser().new_context(**options)
+            try:
+                yield context
+            finally:
+                try:
+                    context.close()
+                except Exception as e:
+                    logger.warning(f"Error closing browser context: {e}")
+                self.pages_served += 1
+                reason = self._recycle_reason()
+                if reason:
+                    logger.info(f"Recycling browser: {reason}")
+                    self._close_browser()
+
+    def memory_mb(self) -> Optional[float]:
+        """Resident memory of this process's children (the Playwright driver and Chromium)"""
+        if not PSUTIL_AVAILABLE:
+            return None
+        import psutil
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+
+    def _recycle_reason(self) -> Optional[str]:
+        if self.pages_served >= self.max_pages:
+            return f"served {self.pages_served} pages"
+        memory = self.memory_mb()
+        if memory is not None and memory > self.max_memory_mb:
+            return f"using {memory:.0f} MB"
+        return None
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser: {e}")
+            self._browser = None
+
+    def close(self):
+        """Close the browser and stop Playwright (worker shutdown)"""
+        with self._lock:
+            self._close_browser()
+            if self._playwright is not None:
+                self._playwright.stop()
+                self._playwright = None
+
+
+browser_pool = BrowserPool()
@@ -1,5 +1,6 @@
 from celery import Celery
 from celery.schedules import crontab
+from datetime import timedelta
 from config import settings
 
 # Initialize Celery
@@ -24,16 +25,25 @@ celery_app.conf.update(
     worker_max_tasks_per_child=50,
 )
 
-# Celery Beat schedule (runs hourly)
+# Celery Beat schedule
 celery_app.conf.beat_schedule = {
-    'scrape-all-stores-hourly': {
+    'scrape-due-stores': {
         'task': 'tasks.scrape_all_stores',
-        'schedule': crontab(minute=0),  # Every hour at :00
+        # Queues only stores whose scrape_frequency has elapsed
+        'schedule': timedelta(minutes=settings.MIN_SCRAPE_FREQUENCY_MINUTES),
+    },
+    'adapt-scrape-frequencies-hourly': {
+        'task': 'tasks.adapt_scrape_frequencies',
+        'schedule': crontab(minute=50),  # Every hour at :50
     },
     'cleanup-expired-coupons-daily': {
         'task': 'tasks.cleanup_expired_coupons',
         'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
     },
+    'reconcile-store-coupon-counts-daily': {
+        'task': 'tasks.reconcile_store_coupon_counts',
+        'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM, after cleanup
+    },
     'reset-daily-limits-daily': {
         'task': 'tasks.reset_daily_limits',
         'schedule': crontab(hour=0, minute=0),  # Daily at midnight
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class ScraperSettings(BaseSettings):
     # Database
@@ -7,14 +7,31 @@ class ScraperSettings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_INVALIDATION_CHANNEL: str = "cache-invalidation"  # must match backend/config.py
     
     # Scraping settings
     SCRAPE_FREQUENCY_MINUTES: int = 60
-    MAX_CONCURRENT_SCRAPERS: int = 5
+    # Per-store intervals adapt to how often coupons change (see adapt_scrape_frequencies)
+    MIN_SCRAPE_FREQUENCY_MINUTES: int = 15  # also how often beat looks for due stores
+    MAX_SCRAPE_FREQUENCY_MINUTES: int = 1440
+    CHANGE_RATE_WINDOW_HOURS: int = 168  # scrape logs considered per store
+    MIN_SCRAPES_TO_ADAPT: int = 3
+    SCRAPES_PER_CHANGE: int = 2  # aim for this many scrapes per observed coupon change
+    MAX_CONCURRENT_SCRAPERS: int = 5  # concurrent page fetches per worker (see async_fetcher.py)
+    MAX_CONNECTIONS_PER_HOST: int = 2
+    STATIC_BATCH_SIZE: int = 25  # generic stores per scrape_static_stores task
+    STATIC_FIRST: bool = True  # try plain HTTP before the browser for javascript stores
+    HTML_PARSER: str = "lxml"  # html.parser, lxml or selectolax; scraper_config['parser'] overrides
     REQUEST_TIMEOUT: int = 30
     RETRY_ATTEMPTS: int = 3
+    COUPON_MISS_THRESHOLD: int = 3  # consecutive scrapes a code may be missing before it is deactivated
+    SCRAPE_QUEUED_TIMEOUT_MINUTES: int = 60  # a queued scrape not logged by then is assumed lost and requeued
     
     # Anti-detection
+    REQUESTS_PER_SECOND_PER_HOST: float = 0.5  # token bucket refill rate (see rate_limit.py)
+    HOST_REQUEST_BURST: int = 1
+    RATE_LIMIT_BACKEND: str = "redis"  # redis: buckets shared by all workers; memory: per process
+    BUSY_HOST_MAX_REQUEUES: int = 5  # then scrape_store waits for the host's token in the worker
     MIN_DELAY_SECONDS: float = 1.0
     MAX_DELAY_SECONDS: float = 3.0
     USE_PROXIES: bool = False
@@ -23,6 +40,26 @@ class ScraperSettings(BaseSettings):
     # Playwright
     PLAYWRIGHT_BROWSERS_PATH: str = "/tmp/playwright-browsers"
     HEADLESS: bool = True
+    BROWSER_EXECUTABLE_PATH: Optional[str] = None  # a system Chrome instead of Playwright's download
+    BROWSER_MAX_PAGES: int = 25  # relaunch the worker's browser after this many scrapes
+    BROWSER_MAX_MEMORY_MB: int = 1024  # ...or once its processes use more memory than this
+    BROWSER_WAIT_UNTIL: str = "domcontentloaded"  # then wait for the coupon_container selector
+    # Requests aborted in browser scrapes; scraper_config may override
+    # block_resource_types and add block_domains per store
+    BLOCKED_RESOURCE_TYPES: List[str] = ["image", "media", "font"]
+    BLOCKED_DOMAINS: List[str] = [
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "facebook.net",
+        "hotjar.com",
+        "segment.io",
+        "optimizely.com",
+        "criteo.com",
+        "analytics.tiktok.com",
+        "bat.bing.com",
+    ]
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,144 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import re
+from typing import Dict, List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTML parser backends for GenericCouponScraper, chosen per store with
+# scraper_config['parser']. lxml and selectolax are optional and fall back to
+# BeautifulSoup's pure-Python html.parser when not installed.
+LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+SELECTOLAX_AVAILABLE = importlib.util.find_spec("selectolax") is not None
+PARSERS = ('html.parser', 'lxml', 'selectolax')
+
+# Coupon fields read from each container, keyed by their scraper_config selector names
+COUPON_FIELDS = ('code', 'title', 'description', 'expiry', 'discount')
+
+# Selectors simple enough to become a SoupStrainer: tag, .class, tag.class or #id
+SIMPLE_SELECTOR = re.compile(r'^(?P<name>[a-zA-Z][\w-]*)?(?:\.(?P<class>[\w-]+)|#(?P<id>[\w-]+))?$')
+
+
+def resolve_parser(name: Optional[str]) -> str:
+    """The parser to use for a configured name, falling back when its package is missing"""
+    name = name or settings.HTML_PARSER
+    if name not in PARSERS:
+        logger.warning(f"Unknown HTML parser {name!r}, using html.parser")
+        return 'html.parser'
+    if name == 'selectolax' and not SELECTOLAX_AVAILABLE:
+        name = 'lxml'
+    if name == 'lxml' and not LXML_AVAILABLE:
+        name = 'html.parser'
+    return name
+
+
+def strainer_for(selector: str) -> Optional[SoupStrainer]:
+    """SoupStrainer matching a simple selector, or None if it cannot be expressed as one"""
+    selector = selector.strip()
+    match = SIMPLE_SELECTOR.match(selector)
+    if not selector or not match:
+        return None
+    attrs = {}
+    if match.group('class'):
+        attrs['class'] = match.group('class')
+    if match.group('id'):
+        attrs['id'] = match.group('id')
+    return SoupStrainer(match.group('name'), attrs)
+
+
+def field_selectors(selectors: Dict) -> Dict[str, str]:
+    """The configured coupon field selectors; fields without a selector are skipped"""
+    return {field: selectors[field] for field in COUPON_FIELDS if selectors.get(field)}
+
+
+class SelectorPlan:
+    """
+    A store's selector map compiled once for extraction: container and field
+    selectors parsed by soupsieve (fields without a selector dropped) and the
+    parse_only SoupStrainer. selectolax takes the selector strings as they are.
+    """
+
+    def __init__(self, selectors: Dict, parse_only=None):
+        self.container_selector = selectors['coupon_container']
+        self.container = soupsieve.compile(self.container_selector)
+        self.fields = {}
+        compiled = []
+        for field, selector in field_selectors(selectors).items():
+            try:
+                compiled.append((field, soupsieve.compile(selector)))
+            except soupsieve.SelectorSyntaxError as e:
+                logger.warning(f"Ignoring invalid {field} selector {selector!r}: {e}")
+                continue
+            self.fields[field] = selector
+        self.compiled_fields = tuple(compiled)
+
+        self.strainer = None
+        if parse_only:
+            scope = self.container_selector if parse_only is True else parse_only
+            self.strainer = strainer_for(scope)
+            if self.strainer is None:
+                logger.warning(f"parse_only selector {scope!r} is not a tag, .class, tag.class or #id; parsing the whole page")
+
+    def extract_soup(self, soup) -> List[Dict]:
+        rows = []
+        for container in self.container.select(soup):
+            texts = {}
+            for field, selector in self.compiled_fields:
+                element = selector.select_one(container)
+                texts[field] = element.get_text() if element is not None else None
+            rows.append(texts)
+        return rows
+
+    def extract_lexbor(self, tree) -> List[Dict]:
+        rows = []
+        for container in tree.css(self.container_selector):
+            texts = {}
+            for field, selector in self.fields.items():
+                element = container.css_first(selector)
+                texts[field] = element.text() if element is not None else None
+            rows.append(texts)
+        return rows
+
+
+# Plans built in this worker process, by stable_hash of (selectors, parse_only)
+_plans: Dict[str, SelectorPlan] = {}
+
+
+def stable_hash(*parts) -> str:
+    """Hex digest of JSON-serializable parts, stable across processes"""
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def selector_plan(selectors: Dict, parse_only=None) -> SelectorPlan:
+    """The compiled plan for a store's selectors, built once per distinct config"""
+    key = stable_hash(selectors, parse_only)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = SelectorPlan(selectors, parse_only)
+    return plan
+
+
+def extract_texts(content: bytes, selectors: Dict, parser: Optional[str] = None, parse_only=None) -> List[Dict]:
+    """
+    Parse a coupon page and return {field: text or None} for every coupon container.
+
+    parse_only limits BeautifulSoup parsers to the subtrees matching a simple
+    selector (True for coupon_container itself); selectolax always parses the
+    whole page.
+    """
+    parser = resolve_parser(parser)
+    plan = selector_plan(selectors, parse_only)
+
+    if parser == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+
+        return plan.extract_lexbor(LexborHTMLParser(content))
+
+    return plan.extract_soup(BeautifulSoup(content, parser, parse_only=plan.strainer))
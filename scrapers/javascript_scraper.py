@@ -1,17 +1,45 @@
 from base_scraper import BaseScraper
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from typing import List, Dict
+from playwright.sync_api import TimeoutError as PlaywrightTimeout
+from typing import List, Dict, Optional
+from urllib.parse import urlsplit
 import logging
+import time
 from config import settings
+from browser_pool import BrowserPool, browser_pool
+from html_parsers import field_selectors
+from rate_limit import host_limiter
 
 logger = logging.getLogger(__name__)
 
+# Runs in the page: maps each container to {field: innerText or null}.
+# An invalid selector leaves its field null instead of failing the whole page.
+EXTRACT_COUPONS_SCRIPT = """
+(containers, fields) => containers.map((container) => {
+    const texts = {};
+    for (const [field, selector] of Object.entries(fields)) {
+        let element = null;
+        try {
+            element = container.querySelector(selector);
+        } catch (e) {}
+        texts[field] = element ? element.innerText : null;
+    }
+    return texts;
+})
+"""
+
 class JavaScriptCouponScraper(BaseScraper):
     """
     JavaScript-heavy website scraper using Playwright
     Works for dynamic sites that load content via JS
     """
     
+    def __init__(self, store: Dict, pool: Optional[BrowserPool] = None):
+        super().__init__(store)
+        self.pool = pool or browser_pool
+        self.metrics['blocked_requests'] = 0
+        # Browser navigations are not conditional; only the content hash applies
+        self.page_state.update(etag=None, last_modified=None)
+    
     def scrape(self) -> List[Dict]:
         coupons = []
         
@@ -23,31 +51,25 @@ class JavaScriptCouponScraper(BaseScraper):
             
             logger.info(f"Scraping {self.store['name']} with Playwright at {url}")
             
-            with sync_playwright() as p:
-                # Launch browser
-                browser = p.chromium.launch(
-                    headless=settings.HEADLESS,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                    ]
-                )
-                
-                # Create context with realistic settings
-                context = browser.new_context(
-                    user_agent=self.ua.random,
-                    viewport={'width': 1920, 'height': 1080},
-                    locale='en-US',
-                )
+            # Isolated context on this worker's long-lived browser
+            with self.pool.context(
+                user_agent=self.ua.random,
+                viewport={'width': 1920, 'height': 1080},
+                locale='en-US',
+            ) as context:
+                # Skip images, fonts, media and trackers; count what is downloaded
+                self.block_requests(context)
                 
                 # Create page
                 page = context.new_page()
+                page.on('response', self.count_bytes)
                 
                 try:
                     # Navigate to page
-                    page.goto(url, wait_until='networkidle', timeout=30000)
+                    self.metrics['wait_seconds'] += host_limiter.wait(url)
+                    self.metrics['requests'] += 1
+                    started = time.perf_counter()
+                    page.goto(url, wait_until=self.config.get('wait_until', settings.BROWSER_WAIT_UNTIL), timeout=30000)
                     
                     # Wait for coupon containers to load
                     selectors = self.config.get('selectors', {})
@@ -62,17 +84,17 @@ class JavaScriptCouponScraper(BaseScraper):
                         self.scroll_to_bottom(page)
                     elif pagination_type == 'button':
                         self.click_load_more(page)
+                    self.metrics['fetch_seconds'] += time.perf_counter() - started
                     
                     # Extract coupons
+                    started = time.perf_counter()
                     coupons = self.extract_coupons_from_page(page, selectors)
+                    self.metrics['parse_seconds'] += time.perf_counter() - started
                     
                     logger.info(f"Successfully scraped {len(coupons)} coupons from {self.store['name']}")
                 
                 except PlaywrightTimeout as e:
                     logger.error(f"Timeout scraping {self.store['name']}: {e}")
-                
-                finally:
-                    browser.close()
         
         except Exception as e:
             logger.error(f"Error scraping {self.store['name']}: {e}")
@@ -80,6 +102,36 @@ class JavaScriptCouponScraper(BaseScraper):
         
         return coupons
     
+    def block_requests(self, context):
+        """Abort blocked resource types and tracker domains before they are requested"""
+        resource_types = set(self.config.get('block_resource_types', settings.BLOCKED_RESOURCE_TYPES))
+        domains = tuple(settings.BLOCKED_DOMAINS) + tuple(self.config.get('block_domains', []))
+        if not resource_types and not domains:
+            return
+        
+        def handle(route):
+            request = route.request
+            host = urlsplit(request.url).hostname or ''
+            if request.resource_type in resource_types or any(
+                host == domain or host.endswith('.' + domain) for domain in domains
+            ):
+                self.metrics['blocked_requests'] += 1
+                route.abort()
+            else:
+                route.continue_()
+        
+        context.route('**/*', handle)
+    
+    def count_bytes(self, response):
+        """
+        Add a response's Content-Length to the metrics. The headers arrive with the
+        response event, unlike request.sizes(), which costs a round trip to the browser;
+        chunked responses without a length are not counted.
+        """
+        length = response.headers.get('content-length', '')
+        if length.isdigit():
+            self.metrics['bytes'] += int(length)
+    
     def scroll_to_bottom(self, page):
         """Scroll to load lazy-loaded content"""
         logger.info("Scrolling to load more content...")
@@ -129,59 +181,15 @@ class JavaScriptCouponScraper(BaseScraper):
             logger.warning(f"Error clicking load more: {e}")
     
     def extract_coupons_from_page(self, page, selectors: Dict) -> List[Dict]:
-        """Extract coupons from Playwright page"""
-        coupons = []
-        
+        """Extract coupons from Playwright page in one round trip to the browser"""
         container_selector = selectors.get('coupon_container')
         if not container_selector:
             logger.error("No coupon_container selector")
             return []
         
-        # Get all coupon containers
-        containers = page.query_selector_all(container_selector)
-        logger.info(f"Found {len(containers)} coupon containers")
+        # Read every configured field of every container inside the page
+        fields = field_selectors(selectors)
+        rows = page.eval_on_selector_all(container_selector, EXTRACT_COUPONS_SCRIPT, fields)
+        logger.info(f"Found {len(rows)} coupon containers")
         
-        for container in containers:
-            try:
-                # Extract code
-                code_elem = container.query_selector(selectors.get('code', ''))
-                if not code_elem:
-                    continue
-                
-                code = self.clean_text(code_elem.inner_text())
-                
-                # Extract title
-                title_elem = container.query_selector(selectors.get('title', ''))
-                title = self.clean_text(title_elem.inner_text()) if title_elem else 'Discount Code'
-                
-                # Extract description
-                desc_elem = container.query_selector(selectors.get('description', ''))
-                description = self.clean_text(desc_elem.inner_text()) if desc_elem else None
-                
-                # Extract expiry
-                expiry_elem = container.query_selector(selectors.get('expiry', ''))
-                expiry_text = self.clean_text(expiry_elem.inner_text()) if expiry_elem else None
-                expires_at = self.parse_expiry_date(expiry_text) if expiry_text else None
-                
-                # Extract discount
-                discount_elem = container.query_selector(selectors.get('discount', ''))
-                discount_text = self.clean_text(discount_elem.inner_text()) if discount_elem else None
-                discount_value, discount_type = self.parse_discount(discount_text) if discount_text else (None, None)
-                
-                coupon = {
-                    'code': code,
-                    'title': title,
-                    'description': description,
-                    'expires_at': expires_at,
-                    'discount_value': discount_value,
-                    'discount_type': discount_type or 'percentage',
-                    'source_url': self.config.get('coupon_list_url'),
-                }
-                
-                coupons.append(coupon)
-                
-            except Exception as e:
-                logger.warning(f"Error extracting coupon: {e}")
-                continue
-        
-        return coupons
+        return self.coupons_from_rows(rows)
@@ -0,0 +1,167 @@
+import logging
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+logger = logging.getLogger(__name__)
+
+# Normalization of scraped coupon text: whitespace, expiry dates and discounts.
+# Coupon pages repeat the same strings ("Expires 12/31/2026", "20% OFF") across
+# containers and scrapes, so the parsers are memoized per worker process.
+MEMO_SIZE = 4096
+
+# Numeric date order by store country: month-first, year-first, otherwise day-first
+MONTH_FIRST_COUNTRIES = {'US', 'CA', 'PH'}
+YEAR_FIRST_COUNTRIES = {'CN', 'JP', 'KR', 'TW'}
+
+WHITESPACE = re.compile(r'\s+')
+
+# 12/31/2026, 31.12.2026, 31-12-26; 2026-12-31, 2026/12/31; 2026年12月31日
+NUMERIC_DATE = re.compile(r'\b(\d{1,2})[/.\-](\d{1,2})[/.\-](\d{4}|\d{2})\b')
+ISO_DATE = re.compile(r'\b(\d{4})[/.\-](\d{1,2})[/.\-](\d{1,2})\b')
+CJK_DATE = re.compile(r'(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日')
+
+# Wording around dates that dateutil cannot parse
+EXPIRY_PREFIX = re.compile(
+    r'^(?:(?:expires?|expiry|exp\.?|ends?|valid\s+(?:until|till|through|thru)|until|offer\s+ends|'
+    r'gültig\s+bis|läuft\s+ab|bis|valable\s+jusqu\'?au|expire\s+le|jusqu\'?au|'
+    r'válido\s+hasta|caduca|hasta|valido\s+fino\s+al|scade\s+il|on|el|le|the|:)\s*[:\-]?\s*)+',
+    re.IGNORECASE
+)
+
+# Month names of the european store locales, mapped to English for dateutil
+MONTH_NAMES = {
+    # German
+    'januar': 'january', 'jänner': 'january', 'februar': 'february', 'märz': 'march', 'mai': 'may',
+    'juni': 'june', 'juli': 'july', 'oktober': 'october', 'dezember': 'december',
+    # French
+    'janvier': 'january', 'février': 'february', 'mars': 'march', 'avril': 'april', 'juin': 'june',
+    'juillet': 'july', 'août': 'august', 'septembre': 'september', 'octobre': 'october',
+    'novembre': 'november', 'décembre': 'december',
+    # Spanish
+    'enero': 'january', 'febrero': 'february', 'marzo': 'march', 'abril': 'april', 'mayo': 'may',
+    'junio': 'june', 'julio': 'july', 'agosto': 'august', 'septiembre': 'september',
+    'octubre': 'october', 'noviembre': 'november', 'diciembre': 'december',
+    # Italian
+    'gennaio': 'january', 'febbraio': 'february', 'aprile': 'april', 'maggio': 'may',
+    'giugno': 'june', 'luglio': 'july', 'settembre': 'september', 'ottobre': 'october',
+    'dicembre': 'december',
+}
+MONTH_NAME = re.compile(r'\b(' + '|'.join(sorted(MONTH_NAMES, key=len, reverse=True)) + r')\b', re.IGNORECASE)
+# "31 de diciembre de 2026"
+SPANISH_DE = re.compile(r'\s+de\s+', re.IGNORECASE)
+
+# 20% / 20 % / 12,5 %
+PERCENTAGE = re.compile(r'(\d+(?:[.,]\d+)?)\s*%')
+# $10, £5, €7.50, 10 €, ₹500, Rs. 500, S$10, RM20, Rp50.000, ¥1,000, ₩5000, ฿100, 50.000₫
+AMOUNT = r'(\d+(?:[.,]\d{3})*(?:[.,]\d{1,2})?)'
+CURRENCY = r'(?:US\$|S\$|C\$|A\$|HK\$|NT\$|\$|£|€|₹|Rs\.?|RM|Rp\.?|¥|￥|₩|฿|₫|₱|zł|Kč)'
+FIXED_AMOUNT = re.compile(rf'{CURRENCY}\s*{AMOUNT}|{AMOUNT}\s*{CURRENCY}')
+NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+SEPARATORS = re.compile(r'[.,]')
+
+
+def date_order(country: Optional[str]) -> str:
+    """'MDY', 'YMD' or 'DMY' for numeric dates on a store's pages"""
+    country = (country or 'US').upper()
+    if country in MONTH_FIRST_COUNTRIES:
+        return 'MDY'
+    if country in YEAR_FIRST_COUNTRIES:
+        return 'YMD'
+    return 'DMY'
+
+
+def clean_text(text: Optional[str]) -> str:
+    """Collapse whitespace runs and strip"""
+    if not text:
+        return ""
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def _date(year: int, month: int, day: int) -> Optional[datetime]:
+    if year < 100:
+        year += 2000
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_expiry_date(text: str, order: str = 'MDY') -> Optional[datetime]:
+    """Parse an expiry date; order ('MDY', 'DMY' or 'YMD') resolves numeric dates like 03/04/2026"""
+    if not text:
+        return None
+    text = text.strip()
+
+    match = CJK_DATE.search(text) or ISO_DATE.search(text)
+    if match:
+        parsed = _date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if parsed:
+            return parsed
+
+    match = NUMERIC_DATE.search(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        month, day = (first, second) if order == 'MDY' else (second, first)
+        # An impossible month means the page uses the other order
+        parsed = _date(year, month, day) or _date(year, day, month)
+        if parsed:
+            return parsed
+
+    # Written dates: "Expires Dec 31, 2026", "gültig bis 31. Dezember 2026"
+    words = EXPIRY_PREFIX.sub('', text)
+    words = MONTH_NAME.sub(lambda m: MONTH_NAMES[m.group(1).lower()], words)
+    words = SPANISH_DE.sub(' ', words)
+    try:
+        return date_parser.parse(words, dayfirst=order == 'DMY', yearfirst=order == 'YMD')
+    except (ValueError, OverflowError):
+        logger.warning(f"Could not parse date: {text}")
+        return None
+
+
+def _amount(number: str) -> float:
+    """12.50 / 12,50 / 1,000 / 50.000: a trailing group of three digits is thousands"""
+    head, separator, tail = max(number.rpartition('.'), number.rpartition(','), key=lambda part: len(part[0]))
+    if not separator:
+        return float(number)
+    if len(tail) == 3:
+        return float(SEPARATORS.sub('', number))
+    return float(SEPARATORS.sub('', head) + '.' + tail)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_discount(text: str) -> Tuple[Optional[float], Optional[str]]:
+    """(value, 'percentage' | 'fixed' | None) from a discount label"""
+    if not text:
+        return None, None
+
+    # Look for percentage: 20% OFF, 20% discount
+    match = PERCENTAGE.search(text)
+    if match:
+        return float(match.group(1).replace(',', '.')), 'percentage'
+
+    # Look for fixed amount: $10 OFF, 10 € Rabatt, ₹500 off
+    match = FIXED_AMOUNT.search(text)
+    if match:
+        return _amount(match.group(1) or match.group(2)), 'fixed'
+
+    # Look for just numbers
+    match = NUMBER.search(text)
+    if match:
+        return float(match.group(1)), None
+
+    return None, None
+
+
+def parse_expiry_dates(texts: Iterable[Optional[str]], order: str = 'MDY') -> List[Optional[datetime]]:
+    """parse_expiry_date over a column of texts"""
+    return [parse_expiry_date(text, order) if text else None for text in texts]
+
+
+def parse_discounts(texts: Iterable[Optional[str]]) -> List[Tuple[Optional[float], Optional[str]]]:
+    """parse_discount over a column of texts"""
+    return [parse_discount(text) if text else (None, None) for text in texts]
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-domain politeness for outgoing requests.
+# Callers reserve a token for the domain and sleep for the returned delay, so the
+# same limiter serves blocking requests (make_request) and asyncio fetches
+# (AsyncFetcher). With RATE_LIMIT_BACKEND=redis the buckets live in Redis and
+# are shared by every Celery worker; scrape_store peeks at a store's bucket
+# and requeues itself rather than sleeping when the domain is busy.
+
+
+def domain_key(domain: str) -> str:
+    """Bucket key for a store domain or URL host"""
+    domain = domain.lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def host_key(url: str) -> str:
+    return domain_key(urlsplit(url).hostname or "")
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens/second, holding at most burst tokens"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, cost: int = 1) -> float:
+        """
+        Take cost tokens (0 to only look) and return the seconds until a token is available.
+        A negative balance records tokens already promised to earlier callers.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        delay = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        self.tokens -= cost
+        return delay
+
+
+class HostRateLimiter:
+    """One in-process token bucket per domain"""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None):
+        self.rate = rate or settings.REQUESTS_PER_SECOND_PER_HOST
+        self.burst = burst or settings.HOST_REQUEST_BURST
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _take(self, key: str, cost: int) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket.take(cost)
+
+    def reserve(self, url: str) -> float:
+        """Take a token for url's domain; returns the seconds until it may be used"""
+        return self._take(host_key(url), 1)
+
+    def ready_in(self, domain: str) -> float:
+        """Seconds until a request to domain would be allowed, without taking a token"""
+        return self._take(domain_key(domain), 0)
+
+    def wait(self, url: str) -> float:
+        """Block until a request to url's domain is allowed; returns the seconds waited"""
+        delay = self.reserve(url)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, url: str) -> float:
+        delay = self.reserve(url)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+# Same arithmetic as TokenBucket.take, atomically in Redis with the server's clock
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local delay = 0
+if tokens < 1 then
+    delay = (1 - tokens) / rate
+end
+if cost > 0 then
+    tokens = tokens - cost
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    -- Expire once the bucket would have refilled; a missing bucket starts full
+    redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+end
+return tostring(delay)
+"""
+
+
+class RedisHostRateLimiter(HostRateLimiter):
+    """
+    Token buckets shared by all workers through Redis.
+    After a Redis error the in-process buckets are used for RETRY_SECONDS
+    before Redis is tried again, so an outage costs one timeout, not one per request.
+    """
+
+    KEY_PREFIX = "politeness:"
+    RETRY_SECONDS = 30
+
+    def __init__(self, url: str, rate: Optional[float] = None, burst: Optional[int] = None):
+        super().__init__(rate, burst)
+        import redis
+        self._errors = redis.RedisError
+        self._script = redis.Redis.from_url(url, socket_timeout=1).register_script(TAKE_SCRIPT)
+        self._retry_at = 0.0
+        self._unavailable = False
+
+    def _local(self) -> bool:
+        return time.monotonic() < self._retry_at
+
+    def _take(self, key: str, cost: int) -> float:
+        if self._local():
+            return super()._take(key, cost)
+        try:
+            delay = float(self._script(keys=[self.KEY_PREFIX + key], args=[self.rate, self.burst, cost]))
+        except self._errors as e:
+            self._retry_at = time.monotonic() + self.RETRY_SECONDS
+            if not self._unavailable:
+                self._unavailable = True
+                logger.warning(f"Redis rate limiter unavailable, using local buckets: {e}")
+            return super()._take(key, cost)
+        if self._unavailable:
+            self._unavailable = False
+            logger.info("Redis rate limiter available again")
+        return delay
+
+    async def wait_async(self, url: str) -> float:
+        if self._local():
+            return await super().wait_async(url)
+        # The Redis round trip blocks; keep it off the event loop so other fetches continue
+        delay = await asyncio.to_thread(self.reserve, url)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+def create_limiter() -> HostRateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisHostRateLimiter(settings.REDIS_URL)
+    return HostRateLimiter()
+
+
+host_limiter = create_limiter()
@@ -1,18 +1,30 @@
 from celery_app import celery_app
-from sqlalchemy import create_engine
+from celery.exceptions import Retry
+from celery.signals import worker_process_shutdown
+from sqlalchemy import and_, case, create_engine, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from config import settings
 from generic_scraper import GenericCouponScraper
+from async_fetcher import AsyncFetcher
+from rate_limit import domain_key, host_key, host_limiter
 from javascript_scraper import JavaScriptCouponScraper
+from browser_pool import browser_pool
 from affiliate_utils import generate_affiliate_url
+import asyncio
+import json
 import logging
+import redis
 import sys
 import os
 
 # Add parent directory to path to import models
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from backend.models import Store, Coupon, ScrapeLog
+from backend.models import Store, Coupon, ScrapeLog, RegionStat
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,10 +33,427 @@ logger = logging.getLogger(__name__)
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
-@celery_app.task(name='tasks.scrape_store')
-def scrape_store(store_id: int):
+redis_client = redis.Redis.from_url(settings.REDIS_URL)
+
+@worker_process_shutdown.connect
+def close_browser_pool(**kwargs):
+    """Close this worker process's browser (worker_max_tasks_per_child restarts or shutdown)"""
+    browser_pool.close()
+
+def publish_cache_invalidation(stores, regions=()):
+    """
+    Tell API processes to drop cached responses built from these stores (and regions).
+    Tag names match backend/cache.py: store:<slug> and region:<region>.
+    """
+    tags = {f"region:{region}" for region in regions}
+    for slug, region in stores:
+        tags.add(f"store:{slug}")
+        tags.add(f"region:{region}")
+    if not tags:
+        return
+    
+    try:
+        redis_client.publish(settings.CACHE_INVALIDATION_CHANNEL, json.dumps(sorted(tags)))
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish cache invalidation for {sorted(tags)}: {e}")
+
+# Coupons per INSERT ... ON CONFLICT statement in upsert_coupons
+UPSERT_BATCH_SIZE = 500
+
+UPSERT_INSERTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert,
+}
+
+# Scraped coupon columns; a change to any of them (or a reactivation) moves updated_at
+COUPON_CONTENT_COLUMNS = ('title', 'description', 'expires_at', 'discount_value', 'discount_type', 'affiliate_url')
+
+def coupon_changed(excluded):
+    """SQL condition: the row proposed for an ON CONFLICT update differs from the stored coupon"""
+    return or_(
+        Coupon.is_active.isnot(True),
+        *(getattr(Coupon, column).is_distinct_from(getattr(excluded, column)) for column in COUPON_CONTENT_COLUMNS)
+    )
+
+def upsert_coupons(db, store_id: int, rows, scraped_at: datetime):
+    """
+    Insert or refresh a store's scraped coupons with batched INSERT ... ON CONFLICT (store_id, code).
+    Existing codes are prefetched in one query to report new/reactivated counts.
+    Returns (new_count, updated_count, activated_count); updated counts codes seen
+    again whose content changed or that were reactivated.
+    """
+    if not rows:
+        return 0, 0, 0
+    
+    existing = dict(db.query(Coupon.code, Coupon.is_active).filter(Coupon.store_id == store_id).all())
+    new_count = sum(1 for row in rows if row['code'] not in existing)
+    activated_count = new_count + sum(1 for row in rows if existing.get(row['code']) is False)
+    
+    rows = [dict(row, scraped_at=scraped_at, updated_at=scraped_at, is_active=True, missed_scrapes=0) for row in rows]
+    
+    insert = UPSERT_INSERTS[db.get_bind().dialect.name](Coupon)
+    statement = insert.on_conflict_do_update(
+        index_elements=[Coupon.store_id, Coupon.code],
+        set_={
+            'title': insert.excluded.title,
+            'description': insert.excluded.description,
+            'expires_at': insert.excluded.expires_at,
+            'discount_value': insert.excluded.discount_value,
+            'discount_type': insert.excluded.discount_type,
+            'affiliate_url': insert.excluded.affiliate_url,
+            'scraped_at': insert.excluded.scraped_at,
+            'is_active': True,
+            'missed_scrapes': 0,
+            # onupdate defaults do not apply to ON CONFLICT updates; a code seen again
+            # unchanged keeps updated_at so the search index does not reindex it
+            'updated_at': case(
+                (coupon_changed(insert.excluded), insert.excluded.updated_at),
+                else_=Coupon.updated_at
+            ),
+        }
+    )
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        db.execute(statement, rows[start:start + UPSERT_BATCH_SIZE])
+    
+    # New and changed rows now carry updated_at == scraped_at (see coupon_changed)
+    written = db.query(func.count(Coupon.id)).filter(
+        Coupon.store_id == store_id, Coupon.updated_at == scraped_at
+    ).scalar()
+    return new_count, written - new_count, activated_count
+
+def deactivate_missing_coupons(db, store_id: int, scraped_at: datetime) -> int:
+    """
+    Count a miss for every active coupon the scrape at scraped_at did not see, and
+    deactivate those missing for COUPON_MISS_THRESHOLD consecutive scrapes.
+    Seen coupons carry scraped_at from upsert_coupons. Returns the number deactivated.
+    """
+    missing = (
+        Coupon.store_id == store_id,
+        Coupon.is_active == True,
+        (Coupon.scraped_at < scraped_at) | (Coupon.scraped_at == None),
+    )
+    # A miss alone is bookkeeping: keep updated_at so the search index does not reindex the row
+    db.query(Coupon).filter(*missing).update(
+        {'missed_scrapes': Coupon.missed_scrapes + 1, 'updated_at': Coupon.updated_at}, synchronize_session=False
+    )
+    return db.query(Coupon).filter(
+        *missing,
+        Coupon.missed_scrapes >= settings.COUPON_MISS_THRESHOLD
+    ).update({'is_active': False, 'updated_at': scraped_at}, synchronize_session=False)
+
+# Region stats buckets: (region, country, store_type, category), '' for missing values
+STATS_BUCKET_COLUMNS = (
+    Store.region,
+    Store.country,
+    func.coalesce(Store.store_type, ''),
+    func.coalesce(Store.category, ''),
+)
+
+def stats_bucket(store):
+    return (store.region, store.country, store.store_type or '', store.category or '')
+
+def _bucket_filter(bucket):
+    region, country, store_type, category = bucket
+    return (
+        RegionStat.region == region,
+        RegionStat.country == country,
+        RegionStat.store_type == store_type,
+        RegionStat.category == category,
+    )
+
+def _bucket_totals(db, bucket):
+    """Live (store_count, coupon_count) for one bucket from the store counters"""
+    return db.query(
+        func.count(Store.id),
+        func.coalesce(func.sum(Store.active_coupon_count), 0)
+    ).filter(
+        Store.is_active == True,
+        *(column == value for column, value in zip(STATS_BUCKET_COLUMNS, bucket))
+    ).one()
+
+def adjust_region_stats(db, bucket, coupon_delta: int):
+    """
+    Apply an active coupon count change to one region_stats row.
+    A missing row means the table does not cover this store yet (new store, or never
+    built), so the whole table is rebuilt from the store counters, which already
+    include the change.
+    """
+    updated = db.query(RegionStat).filter(*_bucket_filter(bucket)).update({
+        'coupon_count': RegionStat.coupon_count + coupon_delta,
+        'updated_at': datetime.utcnow()
+    }, synchronize_session=False)
+    if updated:
+        return
+    
+    try:
+        with db.begin_nested():
+            refresh_region_stats(db)
+    except IntegrityError:
+        # Another worker rebuilt the table first; its totals were read before our change
+        db.query(RegionStat).filter(*_bucket_filter(bucket)).update({
+            'coupon_count': RegionStat.coupon_count + coupon_delta,
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+
+def region_stats_cover_stores(db) -> bool:
+    """Whether region_stats counts every active store (none added or deactivated since it was built)"""
+    counted = db.query(func.coalesce(func.sum(RegionStat.store_count), 0)).scalar()
+    active = db.query(func.count(Store.id)).filter(Store.is_active == True).scalar()
+    return counted == active
+
+def refresh_region_stats(db):
+    """Rebuild region_stats from the store counters"""
+    now = datetime.utcnow()
+    rows = db.query(
+        *STATS_BUCKET_COLUMNS,
+        func.count(Store.id),
+        func.coalesce(func.sum(Store.active_coupon_count), 0)
+    ).filter(
+        Store.is_active == True
+    ).group_by(*STATS_BUCKET_COLUMNS).all()
+    
+    db.query(RegionStat).delete(synchronize_session=False)
+    db.add_all([
+        RegionStat(
+            region=region, country=country, store_type=store_type, category=category,
+            store_count=store_count, coupon_count=coupon_count, updated_at=now
+        )
+        for region, country, store_type, category, store_count, coupon_count in rows
+    ])
+    db.flush()
+    return len(rows)
+
+def store_to_dict(store):
+    """Plain dict of the store fields scrapers use"""
+    return {
+        'id': store.id,
+        'name': store.name,
+        'domain': store.domain,
+        'region': store.region,
+        'country': store.country,
+        'affiliate_network': store.affiliate_network,
+        'affiliate_id': store.affiliate_id,
+        'merchant_id': store.merchant_id,
+        'scraper_config': store.scraper_config or {},
+        'page_etag': store.page_etag,
+        'page_last_modified': store.page_last_modified,
+        'content_hash': store.content_hash,
+    }
+
+def request_host(store):
+    """
+    Rate limit key for the host a store's scrape requests: the coupon_list_url
+    host (often a CDN or subdomain), else the store domain
+    """
+    url = (store.scraper_config or {}).get('coupon_list_url')
+    return host_key(url) if url else domain_key(store.domain)
+
+def scrape_strategy(store):
+    """
+    How to scrape a store: 'generic' (plain HTTP), 'javascript' (browser) or 'auto'.
+    Browser stores (type 'auto', or 'javascript' with STATIC_FIRST) start as 'auto'
+    until a strategy finds coupons and is remembered in store.scrape_strategy.
+    Every other type (generic, api, ...) keeps the plain HTTP scraper.
+    """
+    scraper_type = (store.scraper_config or {}).get('type', 'generic')
+    if scraper_type not in ('javascript', 'auto'):
+        return 'generic'
+    if scraper_type == 'auto' or settings.STATIC_FIRST:
+        return store.scrape_strategy or 'auto'
+    return 'javascript'
+
+def remember_strategy(store, strategy):
+    """Record the strategy that worked for an auto-detected store (None to detect again next run)"""
+    if store.scrape_strategy != strategy:
+        logger.info(f"Scrape strategy for {store.name}: {store.scrape_strategy} -> {strategy}")
+        store.scrape_strategy = strategy
+
+def run_scrapers(store, store_dict):
+    """
+    Scrape a store with its strategy; 'auto' tries plain HTTP first and only
+    launches the browser when that fails or finds no coupons.
+    Returns the coupons, the scraper that produced them and the combined scraper metrics.
+    """
+    strategy = scrape_strategy(store)
+    if strategy != 'auto':
+        scraper = JavaScriptCouponScraper(store_dict) if strategy == 'javascript' else GenericCouponScraper(store_dict)
+        scraped_coupons = scraper.scrape()
+        if strategy == store.scrape_strategy and not scraped_coupons and not scraper.unchanged:
+            # The remembered strategy stopped working: detect again next run
+            remember_strategy(store, None)
+        return scraped_coupons, scraper, scraper.metrics
+    
+    static_scraper = GenericCouponScraper(store_dict)
+    try:
+        scraped_coupons = static_scraper.scrape()
+    except Exception as e:
+        logger.info(f"Plain HTTP failed for {store.name}, trying the browser: {e}")
+        scraped_coupons = []
+    if scraped_coupons or static_scraper.unchanged:
+        remember_strategy(store, 'generic')
+        return scraped_coupons, static_scraper, static_scraper.metrics
+    
+    browser_scraper = JavaScriptCouponScraper(store_dict)
+    scraped_coupons = browser_scraper.scrape()
+    if scraped_coupons or browser_scraper.unchanged:
+        remember_strategy(store, 'javascript')
+    metrics = {name: static_scraper.metrics.get(name, 0) + value for name, value in browser_scraper.metrics.items()}
+    return scraped_coupons, browser_scraper, metrics
+
+def save_scrape(db, store, store_dict, scraper, scraped_coupons, start_time):
+    """Persist a scraper's result: the coupons, or just the visit if its page was unchanged"""
+    if scraper.unchanged:
+        return record_unchanged_scrape(db, store, start_time, page_state=scraper.page_state)
+    return save_scraped_coupons(db, store, store_dict, scraped_coupons, start_time, page_state=scraper.page_state)
+
+def store_page_state(store, page_state, coupons_found):
+    """Keep a scrape's validators and content hash for the next one; a scrape without coupons keeps none"""
+    if not coupons_found:
+        page_state = {'etag': None, 'last_modified': None, 'content_hash': None}
+    store.page_etag = page_state['etag']
+    store.page_last_modified = page_state['last_modified']
+    store.content_hash = page_state['content_hash']
+
+def record_unchanged_scrape(db, store, start_time, page_state=None):
+    """
+    The coupon page is as at the last scrape (304 or identical coupon texts):
+    only last_scraped_at, the page's validators and an 'unchanged' scrape log are written
+    """
+    store.last_scraped_at = datetime.utcnow()
+    store.scrape_queued_at = None
+    if page_state is not None:
+        # A 200 with identical texts may still bring a new ETag or Last-Modified
+        store_page_state(store, page_state, coupons_found=True)
+    db.add(ScrapeLog(
+        store_id=store.id,
+        status='unchanged',
+        coupons_found=store.active_coupon_count,
+        duration_seconds=(datetime.utcnow() - start_time).seconds
+    ))
+    db.commit()
+    
+    logger.info(f"Scraped {store.name}: unchanged")
+    return {'store': store.name, 'unchanged': True}
+
+def save_scraped_coupons(db, store, store_dict, scraped_coupons, start_time, page_state=None):
+    """
+    Persist one store's scrape: upsert coupons, deactivate vanished codes,
+    update counters and region stats, log it and commit.
+    page_state (the scraper's validators and content hash) is stored for the next scrape.
+    """
+    # Process and save coupons
+    coupon_rows = {}
+    for coupon_data in scraped_coupons:
+        try:
+            # Generate affiliate URL
+            affiliate_url = generate_affiliate_url(store_dict, coupon_data)
+            
+            # Last occurrence of a code wins, as with row-by-row updates
+            coupon_rows[coupon_data['code']] = {
+                'store_id': store.id,
+                'code': coupon_data['code'],
+                'title': coupon_data.get('title', 'Discount Code'),
+                'description': coupon_data.get('description'),
+                'expires_at': coupon_data.get('expires_at'),
+                'discount_value': coupon_data.get('discount_value'),
+                'discount_type': coupon_data.get('discount_type', 'percentage'),
+                'affiliate_url': affiliate_url,
+                'source_url': coupon_data.get('source_url'),
+            }
+        
+        except Exception as e:
+            logger.error(f"Error processing coupon {coupon_data.get('code')}: {e}")
+            continue
+    
+    scraped_at = datetime.utcnow()
+    new_count, updated_count, activated_count = upsert_coupons(
+        db, store.id, list(coupon_rows.values()), scraped_at
+    )
+    
+    # Codes no longer on the page; an empty result is more likely a broken scrape than an empty store
+    deactivated_count = 0
+    if coupon_rows:
+        deactivated_count = deactivate_missing_coupons(db, store.id, scraped_at)
+    else:
+        logger.warning(f"No coupons scraped for {store.name}, keeping existing coupons active")
+    
+    # Update store last_scraped_at and maintained coupon counters
+    store.last_scraped_at = datetime.utcnow()
+    store.scrape_queued_at = None
+    active_delta = activated_count - deactivated_count
+    if active_delta:
+        store.active_coupon_count = Store.active_coupon_count + active_delta
+        adjust_region_stats(db, stats_bucket(store), active_delta)
+    if new_count:
+        store.last_coupon_added_at = store.last_scraped_at
+    if page_state is not None:
+        store_page_state(store, page_state, coupons_found=len(scraped_coupons))
+    
+    # Create scrape log
+    duration = (datetime.utcnow() - start_time).seconds
+    scrape_log = ScrapeLog(
+        store_id=store.id,
+        status='success',
+        coupons_found=len(scraped_coupons),
+        coupons_new=new_count,
+        coupons_updated=updated_count,
+        coupons_deactivated=deactivated_count,
+        duration_seconds=duration
+    )
+    db.add(scrape_log)
+    
+    db.commit()
+    
+    publish_cache_invalidation([(store.slug, store.region)])
+    
+    logger.info(f"Scraped {store.name}: {new_count} new, {updated_count} updated, {deactivated_count} deactivated, {len(scraped_coupons)} total")
+    
+    return {
+        'store': store.name,
+        'new': new_count,
+        'updated': updated_count,
+        'deactivated': deactivated_count,
+        'total': len(scraped_coupons)
+    }
+
+def log_scrape_timings(store_name: str, metrics):
+    """Log where a scrape spent its time (rate limit waits vs network vs parsing) and what it downloaded"""
+    timings = {name: round(value, 3) if isinstance(value, float) else value for name, value in metrics.items()}
+    logger.info(
+        f"Timings for {store_name}: {timings['requests']} requests, waited {timings['wait_seconds']}s, "
+        f"fetched {timings['fetch_seconds']}s ({timings['bytes'] / 1024:.0f} KB), parsed {timings['parse_seconds']}s"
+        + (f", blocked {timings['blocked_requests']} requests" if 'blocked_requests' in timings else "")
+    )
+    return timings
+
+def log_scrape_failure(db, store_id: int, start_time, error: Exception):
+    """
+    Record a failed scrape (after discarding any partial changes).
+    A remembered scrape strategy is forgotten so the next run detects it again.
+    """
+    logger.error(f"Failed to scrape store {store_id}: {error}")
+    
+    db.rollback()
+    db.query(Store).filter(Store.id == store_id).update(
+        {Store.scrape_strategy: None, Store.scrape_queued_at: None}, synchronize_session=False
+    )
+    scrape_log = ScrapeLog(
+        store_id=store_id,
+        status='failed',
+        error_message=str(error),
+        duration_seconds=(datetime.utcnow() - start_time).seconds
+    )
+    db.add(scrape_log)
+    db.commit()
+
+@celery_app.task(name='tasks.scrape_store', bind=True)
+def scrape_store(self, store_id: int):
     """
     Scrape a single store for coupons
+    
+    If another worker has just hit the store's host the task is requeued for
+    when the host's token is due, leaving this worker free for a ready store.
+    After BUSY_HOST_MAX_REQUEUES requeues it scrapes anyway, waiting for the token here.
     """
     db = SessionLocal()
     start_time = datetime.utcnow()
@@ -37,120 +466,115 @@ def scrape_store(store_id: int):
             logger.warning(f"Store {store_id} not found or inactive")
             return
         
+        host = request_host(store)
+        delay = host_limiter.ready_in(host)
+        if delay > 0 and self.request.retries < settings.BUSY_HOST_MAX_REQUEUES:
+            logger.info(f"{host} busy, requeueing {store.name} in {delay:.1f}s")
+            raise self.retry(countdown=delay, max_retries=settings.BUSY_HOST_MAX_REQUEUES)
+        
         logger.info(f"Starting scrape for {store.name}")
         
         # Convert SQLAlchemy model to dict
-        store_dict = {
-            'id': store.id,
-            'name': store.name,
-            'domain': store.domain,
-            'region': store.region,
-            'country': store.country,
-            'affiliate_network': store.affiliate_network,
-            'affiliate_id': store.affiliate_id,
-            'merchant_id': store.merchant_id,
-            'scraper_config': store.scraper_config or {}
-        }
+        store_dict = store_to_dict(store)
         
-        # Determine scraper type
-        scraper_type = store_dict['scraper_config'].get('type', 'generic')
+        # Scrape coupons (plain HTTP first for auto-detected stores)
+        scraped_coupons, scraper, metrics = run_scrapers(store, store_dict)
         
-        # Initialize appropriate scraper
-        if scraper_type == 'javascript':
-            scraper = JavaScriptCouponScraper(store_dict)
-        else:
-            scraper = GenericCouponScraper(store_dict)
+        result = save_scrape(db, store, store_dict, scraper, scraped_coupons, start_time)
+        result['timings'] = log_scrape_timings(store.name, metrics)
+        return result
+    
+    except Retry:
+        raise
+    
+    except Exception as e:
+        log_scrape_failure(db, store_id, start_time, e)
+        raise
+    
+    finally:
+        db.close()
+
+async def fetch_static_pages(scrapers):
+    """Download every scraper's coupon page concurrently; maps store id to content or the exception raised"""
+    async with AsyncFetcher() as fetcher:
+        pages = await asyncio.gather(
+            *(scraper.fetch_page(fetcher) for scraper in scrapers.values()),
+            return_exceptions=True
+        )
+    return dict(zip(scrapers.keys(), pages))
+
+def run_in_own_loop(coroutine):
+    """
+    Run a coroutine on a new event loop in a separate thread and return its result.
+    Celery tasks are sync, and this thread may already run a loop (sync Playwright
+    keeps one once the browser pool started), where asyncio.run would refuse.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+@celery_app.task(name='tasks.scrape_static_stores')
+def scrape_static_stores(store_ids, deferrals: int = 0):
+    """
+    Scrape a batch of static (generic) stores: pages are fetched concurrently
+    over one connection pool, then parsed and saved store by store.
+    deferrals counts how often these stores were put off for a busy host.
+    """
+    db = SessionLocal()
+    
+    try:
+        stores = db.query(Store).filter(Store.id.in_(store_ids), Store.is_active == True).all()
         
-        # Scrape coupons
-        scraped_coupons = scraper.scrape()
+        # Leave stores whose host is busy for a later batch instead of waiting on them here,
+        # up to BUSY_HOST_MAX_REQUEUES times; then the fetcher waits for their tokens
+        deferred = []
+        if deferrals < settings.BUSY_HOST_MAX_REQUEUES:
+            delays = {store.id: host_limiter.ready_in(request_host(store)) for store in stores}
+            deferred = [store_id for store_id, delay in delays.items() if delay > 0]
+        if deferred:
+            countdown = min(delays[store_id] for store_id in deferred)
+            scrape_static_stores.apply_async((deferred, deferrals + 1), countdown=countdown)
+            logger.info(f"Deferred {len(deferred)} static stores with busy hosts by {countdown:.1f}s")
+            stores = [store for store in stores if delays[store.id] <= 0]
+        
+        store_dicts = {store.id: store_to_dict(store) for store in stores}
+        scrapers = {store_id: GenericCouponScraper(store_dict) for store_id, store_dict in store_dicts.items()}
         
-        # Process and save coupons
-        new_count = 0
-        updated_count = 0
+        logger.info(f"Fetching {len(scrapers)} static stores")
+        try:
+            pages = run_in_own_loop(fetch_static_pages(scrapers))
+        except Exception as e:
+            # The batch fetch itself failed: log the failure for every store in it
+            pages = {store_id: e for store_id in scrapers}
         
-        for coupon_data in scraped_coupons:
+        scraped = 0
+        unchanged = 0
+        failed = 0
+        totals = {'requests': 0, 'wait_seconds': 0.0, 'fetch_seconds': 0.0, 'parse_seconds': 0.0, 'bytes': 0}
+        for store in stores:
+            scraper = scrapers[store.id]
+            # Each store's duration is its own wait and fetch time plus its parse and save,
+            # not the time since the batch started
+            network_seconds = scraper.metrics['wait_seconds'] + scraper.metrics['fetch_seconds']
+            start_time = datetime.utcnow() - timedelta(seconds=network_seconds)
             try:
-                # Check if coupon exists
-                existing = db.query(Coupon).filter(
-                    Coupon.store_id == store_id,
-                    Coupon.code == coupon_data['code']
-                ).first()
-                
-                # Generate affiliate URL
-                affiliate_url = generate_affiliate_url(store_dict, coupon_data)
-                
-                if existing:
-                    # Update existing coupon
-                    existing.title = coupon_data.get('title', existing.title)
-                    existing.description = coupon_data.get('description', existing.description)
-                    existing.expires_at = coupon_data.get('expires_at', existing.expires_at)
-                    existing.discount_value = coupon_data.get('discount_value', existing.discount_value)
-                    existing.discount_type = coupon_data.get('discount_type', existing.discount_type)
-                    existing.affiliate_url = affiliate_url
-                    existing.scraped_at = datetime.utcnow()
-                    existing.is_active = True
-                    updated_count += 1
-                else:
-                    # Create new coupon
-                    new_coupon = Coupon(
-                        store_id=store_id,
-                        code=coupon_data['code'],
-                        title=coupon_data.get('title', 'Discount Code'),
-                        description=coupon_data.get('description'),
-                        expires_at=coupon_data.get('expires_at'),
-                        discount_value=coupon_data.get('discount_value'),
-                        discount_type=coupon_data.get('discount_type', 'percentage'),
-                        affiliate_url=affiliate_url,
-                        source_url=coupon_data.get('source_url'),
-                        scraped_at=datetime.utcnow()
-                    )
-                    db.add(new_coupon)
-                    new_count += 1
-            
+                page = pages[store.id]
+                if isinstance(page, Exception):
+                    raise page
+                scraped_coupons = scraper.parse_coupons(page) if page is not None else []
+                if store.scrape_strategy == 'generic' and not scraped_coupons and not scraper.unchanged:
+                    # Plain HTTP stopped finding coupons: detect again next run
+                    remember_strategy(store, None)
+                save_scrape(db, store, store_dicts[store.id], scraper, scraped_coupons, start_time)
+                scraped += 1
+                unchanged += scraper.unchanged
             except Exception as e:
-                logger.error(f"Error processing coupon {coupon_data.get('code')}: {e}")
-                continue
-        
-        # Update store last_scraped_at
-        store.last_scraped_at = datetime.utcnow()
-        
-        # Create scrape log
-        duration = (datetime.utcnow() - start_time).seconds
-        scrape_log = ScrapeLog(
-            store_id=store_id,
-            status='success',
-            coupons_found=len(scraped_coupons),
-            coupons_new=new_count,
-            coupons_updated=updated_count,
-            duration_seconds=duration
-        )
-        db.add(scrape_log)
+                log_scrape_failure(db, store.id, start_time, e)
+                failed += 1
+            for name in totals:
+                totals[name] += scraper.metrics[name]
         
-        db.commit()
-        
-        logger.info(f"Scraped {store.name}: {new_count} new, {updated_count} updated, {len(scraped_coupons)} total")
-        
-        return {
-            'store': store.name,
-            'new': new_count,
-            'updated': updated_count,
-            'total': len(scraped_coupons)
-        }
-    
-    except Exception as e:
-        # Log failure
-        logger.error(f"Failed to scrape store {store_id}: {e}")
-        
-        scrape_log = ScrapeLog(
-            store_id=store_id,
-            status='failed',
-            error_message=str(e),
-            duration_seconds=(datetime.utcnow() - start_time).seconds
-        )
-        db.add(scrape_log)
-        db.commit()
-        
-        raise
+        logger.info(f"Scraped {scraped} static stores ({unchanged} unchanged), {failed} failed")
+        return {'scraped': scraped, 'unchanged': unchanged, 'failed': failed, 'deferred': len(deferred), 'timings': log_scrape_timings(f"batch of {len(stores)}", totals)}
     
     finally:
         db.close()
@@ -166,27 +590,121 @@ def scrape_all_stores():
         # Get all active stores
         stores = db.query(Store).filter(Store.is_active == True).all()
         
+        # Pick up stores added or deactivated since region_stats was built
+        if not region_stats_cover_stores(db):
+            buckets = refresh_region_stats(db)
+            db.commit()
+            publish_cache_invalidation([], regions={store.region for store in stores})
+            logger.info(f"Rebuilt {buckets} region stats rows for the current store set")
+        
         logger.info(f"Queuing scraping for {len(stores)} stores")
         
-        queued = 0
+        now = datetime.utcnow()
+        queued_since = now - timedelta(minutes=settings.SCRAPE_QUEUED_TIMEOUT_MINUTES)
+        static_store_ids = []
+        browser_store_ids = []
         for store in stores:
             # Check if enough time has passed since last scrape
             if store.last_scraped_at:
-                time_since_scrape = (datetime.utcnow() - store.last_scraped_at).total_seconds() / 60
+                time_since_scrape = (now - store.last_scraped_at).total_seconds() / 60
                 if time_since_scrape < store.scrape_frequency:
                     logger.debug(f"Skipping {store.name} - scraped {time_since_scrape:.1f} min ago")
                     continue
+            # A scrape still waiting in the queue (or requeued for a busy host) is not queued twice
+            if store.scrape_queued_at and store.scrape_queued_at > queued_since:
+                logger.debug(f"Skipping {store.name} - already queued")
+                continue
             
-            # Queue scraping task
-            scrape_store.delay(store.id)
-            queued += 1
+            # Static stores are fetched concurrently in batches; browser stores one per task
+            if scrape_strategy(store) == 'generic':
+                static_store_ids.append(store.id)
+            else:
+                browser_store_ids.append(store.id)
+            store.scrape_queued_at = now
         
-        logger.info(f"Queued {queued} stores for scraping")
+        # Mark before dispatching, so a fast worker's clear is not overwritten
+        db.commit()
+        for store_id in browser_store_ids:
+            scrape_store.delay(store_id)
+        for start in range(0, len(static_store_ids), settings.STATIC_BATCH_SIZE):
+            scrape_static_stores.delay(static_store_ids[start:start + settings.STATIC_BATCH_SIZE])
+        
+        queued = len(static_store_ids) + len(browser_store_ids)
+        logger.info(f"Queued {queued} stores for scraping ({len(static_store_ids)} static)")
         return {'queued': queued, 'total': len(stores)}
     
     finally:
         db.close()
 
+def adapted_frequency(current: int, scrapes: int, changes: int, span_minutes: float) -> int:
+    """
+    A store's next scrape interval in minutes from its recent scrape logs:
+    the observed mean time between coupon changes divided by
+    SCRAPES_PER_CHANGE, moving at most 2x per adjustment and kept within
+    the configured bounds
+    """
+    current = current or settings.SCRAPE_FREQUENCY_MINUTES
+    if scrapes < settings.MIN_SCRAPES_TO_ADAPT:
+        return current
+    
+    # One pseudo-change so stores that never change still get a finite interval
+    change_interval = span_minutes / (changes + 1)
+    target = change_interval / settings.SCRAPES_PER_CHANGE
+    target = min(max(target, current / 2), current * 2)
+    return int(min(max(target, settings.MIN_SCRAPE_FREQUENCY_MINUTES), settings.MAX_SCRAPE_FREQUENCY_MINUTES))
+
+@celery_app.task(name='tasks.adapt_scrape_frequencies')
+def adapt_scrape_frequencies():
+    """
+    Lengthen scrape intervals for stores whose coupons rarely change and
+    shorten them for volatile ones
+    """
+    db = SessionLocal()
+    
+    try:
+        now = datetime.utcnow()
+        since = now - timedelta(hours=settings.CHANGE_RATE_WINDOW_HOURS)
+        
+        # A change is a saved scrape that added, edited or deactivated coupons. Empty scrapes
+        # (broken pages, api stores) and strategy switches also log 'success' but write none of these
+        history = db.query(
+            Store.id,
+            Store.scrape_frequency,
+            func.count(ScrapeLog.id),
+            func.sum(case((and_(ScrapeLog.status == 'success', or_(
+                ScrapeLog.coupons_new > 0, ScrapeLog.coupons_updated > 0, ScrapeLog.coupons_deactivated > 0
+            )), 1), else_=0)),
+            func.min(ScrapeLog.scraped_at),
+        ).join(ScrapeLog, ScrapeLog.store_id == Store.id).filter(
+            Store.is_active == True,
+            ScrapeLog.scraped_at >= since,
+            ScrapeLog.status.in_(('success', 'unchanged'))
+        ).group_by(Store.id, Store.scrape_frequency).all()
+        
+        updates = []
+        scrapes_before = scrapes_after = 0
+        for store_id, current, scrapes, changes, first_scraped_at in history:
+            current = current or settings.SCRAPE_FREQUENCY_MINUTES
+            span_minutes = (now - first_scraped_at).total_seconds() / 60
+            frequency = adapted_frequency(current, scrapes, changes or 0, span_minutes)
+            if frequency != current:
+                updates.append({'id': store_id, 'scrape_frequency': frequency})
+            scrapes_before += 1440 / current
+            scrapes_after += 1440 / frequency
+        
+        if updates:
+            db.execute(update(Store), updates)
+        db.commit()
+        
+        logger.info(
+            f"Adapted scrape frequency for {len(updates)} of {len(history)} stores: "
+            f"{scrapes_before:.0f} -> {scrapes_after:.0f} scrapes/day"
+        )
+        return {'adapted': len(updates), 'stores': len(history), 'scrapes_per_day': round(scrapes_after)}
+    
+    finally:
+        db.close()
+
 @celery_app.task(name='tasks.cleanup_expired_coupons')
 def cleanup_expired_coupons():
     """
@@ -195,20 +713,89 @@ def cleanup_expired_coupons():
     db = SessionLocal()
     
     try:
-        # Deactivate coupons past expiry date
-        expired_count = db.query(Coupon).filter(
+        expired_filter = (
             Coupon.expires_at < datetime.utcnow(),
             Coupon.is_active == True
-        ).update({'is_active': False})
+        )
+        
+        # Per-store totals so the store counters shrink in the same transaction
+        expired_by_store = db.query(Coupon.store_id, func.count(Coupon.id)).filter(
+            *expired_filter
+        ).group_by(Coupon.store_id).all()
+        
+        # Same totals per region stats bucket (which only cover active stores)
+        expired_by_bucket = db.query(*STATS_BUCKET_COLUMNS, func.count(Coupon.id)).join(
+            Store, Coupon.store_id == Store.id
+        ).filter(
+            *expired_filter,
+            Store.is_active == True
+        ).group_by(*STATS_BUCKET_COLUMNS).all()
+        
+        # Deactivate coupons past expiry date
+        expired_count = db.query(Coupon).filter(
+            *expired_filter
+        ).update({'is_active': False, 'updated_at': datetime.utcnow()}, synchronize_session=False)
+        
+        for store_id, count in expired_by_store:
+            db.query(Store).filter(Store.id == store_id).update(
+                {'active_coupon_count': Store.active_coupon_count - count},
+                synchronize_session=False
+            )
+        
+        for *bucket, count in expired_by_bucket:
+            adjust_region_stats(db, tuple(bucket), -count)
         
         db.commit()
         
+        if expired_by_store:
+            publish_cache_invalidation(
+                db.query(Store.slug, Store.region).filter(
+                    Store.id.in_([store_id for store_id, _ in expired_by_store])
+                ).all()
+            )
+        
         logger.info(f"Deactivated {expired_count} expired coupons")
         return {'deactivated': expired_count}
     
     finally:
         db.close()
 
+@celery_app.task(name='tasks.reconcile_store_coupon_counts')
+def reconcile_store_coupon_counts():
+    """
+    Repair drift between Store.active_coupon_count and the coupons table
+    """
+    db = SessionLocal()
+    
+    try:
+        actual_count = select(func.count(Coupon.id)).where(
+            Coupon.store_id == Store.id,
+            Coupon.is_active == True
+        ).scalar_subquery()
+        
+        drifted = db.query(Store.id, Store.slug, Store.region).filter(
+            Store.active_coupon_count != actual_count
+        ).all()
+        
+        repaired = 0
+        if drifted:
+            repaired = db.query(Store).filter(
+                Store.id.in_([store_id for store_id, _, _ in drifted])
+            ).update({'active_coupon_count': actual_count}, synchronize_session=False)
+        
+        # Rebuild region stats from the repaired counters (also picks up store changes)
+        buckets = refresh_region_stats(db)
+        
+        db.commit()
+        
+        publish_cache_invalidation([(slug, region) for _, slug, region in drifted])
+        
+        logger.info(f"Reconciled active coupon counts for {repaired} stores, rebuilt {buckets} region stats rows")
+        return {'repaired': repaired, 'region_stats': buckets}
+    
+    finally:
+        db.close()
+
 @celery_app.task(name='tasks.reset_daily_limits')
 def reset_daily_limits():
     """
@@ -15,6 +15,19 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def scratch_database():
+    """Engine and session on an empty in-memory SQLite database with the backend tables"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from backend.models_sqlite import Base
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    # tasks.py maps backend/models.py, whose Postgres tsvector columns SQLite lacks
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE stores ADD COLUMN search_vector TEXT")
+        conn.exec_driver_sql("ALTER TABLE coupons ADD COLUMN search_vector TEXT")
+    return engine, sessionmaker(bind=engine)()
+
 def test_imports():
     """Test that all modules can be imported"""
     try:
@@ -59,6 +72,663 @@ def test_generic_scraper():
         logger.error(f"❌ Generic scraper error: {e}")
         return False
 
+def test_scrape_strategy():
+    """Test which stores are auto-detected and how auto mode escalates to the browser"""
+    try:
+        from types import SimpleNamespace
+        import tasks
+        
+        # Only browser store types are auto-detected; api and other types stay generic
+        for scraper_type, remembered, strategy in (
+            ('generic', None, 'generic'), ('api', None, 'generic'), ('auto', None, 'auto'),
+            ('javascript', None, 'auto'), ('auto', 'javascript', 'javascript'),
+        ):
+            store = SimpleNamespace(scraper_config={'type': scraper_type}, scrape_strategy=remembered)
+            assert tasks.scrape_strategy(store) == strategy, (scraper_type, remembered)
+        
+        def fake_scraper(coupons, built):
+            class FakeScraper:
+                def __init__(self, store_dict):
+                    built.append(self)
+                    self.unchanged = False
+                    self.metrics = {'requests': 1, 'bytes': 100}
+                
+                def scrape(self):
+                    return list(coupons)
+            return FakeScraper
+        
+        def run(static_coupons, browser_coupons, remembered=None):
+            static, browser = [], []
+            store = SimpleNamespace(name='Auto Store', scraper_config={'type': 'auto'}, scrape_strategy=remembered)
+            tasks.GenericCouponScraper = fake_scraper(static_coupons, static)
+            tasks.JavaScriptCouponScraper = fake_scraper(browser_coupons, browser)
+            coupons, scraper, metrics = tasks.run_scrapers(store, {})
+            return store, static, browser, coupons, scraper, metrics
+        
+        generic, javascript = tasks.GenericCouponScraper, tasks.JavaScriptCouponScraper
+        try:
+            # Static finds nothing: the browser runs, its coupons are kept and its strategy remembered
+            store, static, browser, coupons, scraper, metrics = run([], [{'code': 'JS10'}])
+            assert len(static) == len(browser) == 1
+            assert coupons == [{'code': 'JS10'}] and scraper is browser[0]
+            assert store.scrape_strategy == 'javascript'
+            assert metrics == {'requests': 2, 'bytes': 200}
+            
+            # Static finds coupons: no browser
+            store, static, browser, coupons, scraper, metrics = run([{'code': 'HTTP10'}], [{'code': 'JS10'}])
+            assert browser == [] and scraper is static[0] and store.scrape_strategy == 'generic'
+            
+            # A remembered strategy that finds nothing is forgotten, to detect again next run
+            store, static, browser, coupons, scraper, metrics = run([], [], remembered='javascript')
+            assert static == [] and len(browser) == 1 and store.scrape_strategy is None
+        finally:
+            tasks.GenericCouponScraper, tasks.JavaScriptCouponScraper = generic, javascript
+        
+        logger.info("✅ Scrape strategy working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Scrape strategy error: {e}")
+        return False
+
+def test_html_parsers():
+    """Test every HTML parser backend extracts the same coupons, with and without scoping"""
+    try:
+        from html_parsers import PARSERS, extract_texts
+        
+        page = b'''<html><body><div class="grid"><div class="coupon">Not a coupon</div></div>
+        <ul id="coupons">
+            <li class="coupon"><span class="code">SAVE10</span><h3>10% off</h3></li>
+            <li class="coupon"><span class="code">FREESHIP</span></li>
+        </ul></body></html>'''
+        selectors = {'coupon_container': 'li.coupon', 'code': '.code', 'title': 'h3'}
+        expected = [{'code': 'SAVE10', 'title': '10% off'}, {'code': 'FREESHIP', 'title': None}]
+        
+        for parser in PARSERS:
+            for parse_only in (None, True, '#coupons'):
+                texts = extract_texts(page, selectors, parser=parser, parse_only=parse_only)
+                assert texts == expected, f"{parser} parse_only={parse_only}: {texts}"
+        
+        logger.info("✅ HTML parsers agree")
+        return True
+    except Exception as e:
+        logger.error(f"❌ HTML parsers error: {e}")
+        return False
+
+def test_normalize():
+    """Test expiry dates follow the store's locale and discounts read local currencies"""
+    try:
+        from normalize import date_order, parse_expiry_date, parse_discount
+        
+        assert parse_expiry_date("Expires 03/04/2026", date_order('US')) == datetime(2026, 3, 4)
+        assert parse_expiry_date("Expires 03/04/2026", date_order('GB')) == datetime(2026, 4, 3)
+        assert parse_expiry_date("Gültig bis 31. Dezember 2026", date_order('DE')) == datetime(2026, 12, 31)
+        assert parse_expiry_date("2026年12月31日まで", date_order('JP')) == datetime(2026, 12, 31)
+        assert parse_expiry_date("Limited time only", 'MDY') is None
+        
+        assert parse_discount("20% OFF") == (20.0, 'percentage')
+        assert parse_discount("10 € Rabatt") == (10.0, 'fixed')
+        assert parse_discount("Rs. 1,500 off") == (1500.0, 'fixed')
+        assert parse_discount("Free shipping") == (None, None)
+        
+        logger.info("✅ Normalization working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Normalization error: {e}")
+        return False
+
+def test_async_fetcher():
+    """Test concurrent fetching with the per-host limit against a local server"""
+    try:
+        import asyncio
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from async_fetcher import AsyncFetcher
+        from generic_scraper import GenericCouponScraper
+        from rate_limit import HostRateLimiter
+        
+        in_flight = []
+        peak = []
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                in_flight.append(1)
+                peak.append(len(in_flight))
+                time.sleep(0.2)
+                in_flight.pop()
+                body = b'<div class="coupon"><span class="code">SAVE10</span><h3>10% off</h3></div>'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/coupons"
+        
+        mock_store = {
+            'name': 'Test Store',
+            'domain': '127.0.0.1',
+            'scraper_config': {
+                'type': 'generic',
+                'coupon_list_url': url,
+                'selectors': {
+                    'coupon_container': '.coupon',
+                    'code': '.code',
+                    'title': 'h3',
+                    'description': 'p',
+                    'expiry': '.expiry',
+                    'discount': 'h3'
+                }
+            }
+        }
+        scrapers = [GenericCouponScraper(mock_store) for _ in range(6)]
+        
+        async def fetch_all():
+            # Generous rate limit so only the connection limits are exercised
+            async with AsyncFetcher(concurrency=4, per_host=2, limiter=HostRateLimiter(rate=1000, burst=10)) as fetcher:
+                return await asyncio.gather(*(scraper.fetch_page(fetcher) for scraper in scrapers))
+        
+        pages = asyncio.run(fetch_all())
+        
+        assert max(peak) == 2, f"expected 2 concurrent requests per host, saw {max(peak)}"
+        assert scrapers[0].parse_coupons(pages[0])[0]['code'] == 'SAVE10'
+        
+        # Requests queued on a busy host must not hold the global slots another host needs
+        other = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=other.serve_forever, daemon=True).start()
+        
+        async def fetch_mixed():
+            async with AsyncFetcher(concurrency=2, per_host=1, limiter=HostRateLimiter(rate=1000, burst=10)) as fetcher:
+                started = time.perf_counter()
+                busy = [asyncio.create_task(fetcher.fetch(url)) for _ in range(3)]
+                await asyncio.sleep(0.01)
+                await fetcher.fetch(f"http://127.0.0.1:{other.server_port}/coupons")
+                elapsed = time.perf_counter() - started
+                await asyncio.gather(*busy)
+                return elapsed
+        
+        elapsed = asyncio.run(fetch_mixed())
+        server.shutdown()
+        other.shutdown()
+        assert elapsed < 0.35, f"request to an idle host waited {elapsed:.2f}s behind a busy one"
+        
+        logger.info("✅ Async fetcher respects the per-host limit")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Async fetcher error: {e}")
+        return False
+
+def test_unchanged_pages():
+    """Test conditional GETs and the content hash mark unchanged coupon pages"""
+    try:
+        import asyncio
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from async_fetcher import AsyncFetcher
+        from generic_scraper import GenericCouponScraper
+        from rate_limit import HostRateLimiter
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                # Only /etag honours validators; /plain always answers 200 with fresh markup
+                if self.path == '/etag' and self.headers.get('If-None-Match') == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = f'<div class="coupon" data-nonce="{id(self)}"><span class="code">SAVE10</span></div>'.encode()
+                if self.path == '/empty':
+                    body = b'<p>Temporarily unavailable</p>'
+                self.send_response(200)
+                self.send_header('ETag', '"v1"')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        
+        def scraper(path, **state):
+            return GenericCouponScraper({
+                'name': 'Test Store',
+                'domain': '127.0.0.1',
+                'scraper_config': {
+                    'coupon_list_url': base + path,
+                    'selectors': {'coupon_container': '.coupon', 'code': '.code'},
+                },
+                **state,
+            })
+        
+        async def scrape(scraper):
+            async with AsyncFetcher(limiter=HostRateLimiter(rate=1000, burst=10)) as fetcher:
+                page = await scraper.fetch_page(fetcher)
+            return scraper.parse_coupons(page) if page is not None else []
+        
+        first = scraper('/etag')
+        assert [coupon['code'] for coupon in asyncio.run(scrape(first))] == ['SAVE10']
+        assert first.page_state['etag'] == '"v1"' and not first.unchanged
+        
+        # 304: nothing downloaded or parsed
+        again = scraper('/etag', page_etag='"v1"')
+        assert asyncio.run(scrape(again)) == [] and again.unchanged
+        
+        # 200 with different markup but the same coupon texts
+        plain = scraper('/plain', content_hash=first.page_state['content_hash'])
+        assert asyncio.run(scrape(plain)) == [] and plain.unchanged
+        
+        # Same texts under a new ETag: the unchanged visit stores it and the next request sends it
+        from types import SimpleNamespace
+        from datetime import datetime
+        from tasks import record_unchanged_scrape
+        stale = scraper('/etag', page_etag='"v0"', content_hash=first.page_state['content_hash'])
+        assert asyncio.run(scrape(stale)) == [] and stale.unchanged
+        store = SimpleNamespace(id=1, name='Test Store', active_coupon_count=1, last_scraped_at=None,
+                                page_etag='"v0"', page_last_modified=None, content_hash=stale.page_state['content_hash'])
+        db = SimpleNamespace(add=lambda row: None, commit=lambda: None)
+        record_unchanged_scrape(db, store, datetime.utcnow(), page_state=stale.page_state)
+        assert store.page_etag == '"v1"'
+        revisit = scraper('/etag', page_etag=store.page_etag, content_hash=store.content_hash)
+        assert asyncio.run(scrape(revisit)) == [] and revisit.unchanged and revisit.metrics['bytes'] == 0
+        
+        # A page without coupons is never unchanged and keeps no hash
+        from html_parsers import stable_hash
+        empty = scraper('/empty', content_hash=stable_hash([]))
+        assert asyncio.run(scrape(empty)) == [] and not empty.unchanged
+        assert empty.page_state['content_hash'] is None
+        server.shutdown()
+        
+        logger.info("✅ Unchanged pages detected")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Unchanged pages error: {e}")
+        return False
+
+def test_host_rate_limiter():
+    """Test the per-host token bucket spaces requests and keeps hosts independent"""
+    try:
+        from rate_limit import HostRateLimiter
+        
+        limiter = HostRateLimiter(rate=10, burst=2)
+        delays = [limiter.reserve("https://shop.example.com/a") for _ in range(4)]
+        other = limiter.reserve("https://other.example.com/")
+        
+        assert delays[:2] == [0.0, 0.0], delays
+        assert 0.09 < delays[2] < 0.11 and 0.19 < delays[3] < 0.21, delays
+        assert other == 0.0
+        
+        logger.info("✅ Host rate limiter working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Host rate limiter error: {e}")
+        return False
+
+def test_politeness_scheduler():
+    """Test domain readiness checks share buckets with requests and survive a Redis outage"""
+    try:
+        from rate_limit import RedisHostRateLimiter
+        
+        # Nothing listens on port 1: calls fall back to the local buckets
+        limiter = RedisHostRateLimiter("redis://localhost:1/0", rate=10, burst=1)
+        attempts = []
+        script = limiter._script
+        limiter._script = lambda **kwargs: attempts.append(kwargs) or script(**kwargs)
+        
+        assert limiter.ready_in("www.shop.example.com") == 0.0
+        assert limiter.ready_in("shop.example.com") == 0.0, "checking must not take a token"
+        assert limiter.reserve("https://shop.example.com/deals") == 0.0
+        assert 0.09 < limiter.ready_in("www.shop.example.com") < 0.11
+        assert limiter.ready_in("other.example.com") == 0.0
+        # Only the first call tried Redis; the rest stay local until RETRY_SECONDS pass
+        assert len(attempts) == 1, attempts
+        
+        # A slow Redis round trip does not stall other coroutines on the loop
+        import asyncio
+        import time
+        limiter._retry_at = 0.0
+        limiter._script = lambda **kwargs: time.sleep(0.3) or "0"
+        
+        async def wait_and_tick():
+            ticks = 0
+            waiting = asyncio.ensure_future(limiter.wait_async("https://slow.example.com/"))
+            while not waiting.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return ticks
+        assert asyncio.run(wait_and_tick()) > 10
+        
+        # Readiness is checked on the host the scrape requests, not the store domain
+        from types import SimpleNamespace
+        from tasks import request_host
+        store = SimpleNamespace(domain='shop.example.com',
+                                scraper_config={'coupon_list_url': 'https://WWW.Deals.Shop-CDN.net/coupons'})
+        assert request_host(store) == 'deals.shop-cdn.net'
+        assert request_host(SimpleNamespace(domain='www.shop.example.com', scraper_config=None)) == 'shop.example.com'
+        
+        logger.info("✅ Politeness scheduler working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Politeness scheduler error: {e}")
+        return False
+
+def test_coupon_upsert():
+    """Test re-scraped coupons only move updated_at when their content changes"""
+    try:
+        from datetime import timedelta
+        from tasks import upsert_coupons
+        from backend.models_sqlite import Store, Coupon
+        engine, db = scratch_database()
+        db.add(Store(id=1, name='Upsert Store', slug='upsert-store', domain='upsert.example.com',
+                     region='america', country='US'))
+        db.commit()
+        
+        rows = [{'store_id': 1, 'code': code, 'title': f"{code} deal", 'description': None, 'expires_at': None,
+                 'discount_value': 10.0, 'discount_type': 'percentage', 'affiliate_url': None, 'source_url': None}
+                for code in ('SAME', 'EDITED', 'BACK')]
+        first = datetime(2024, 1, 1)
+        assert upsert_coupons(db, 1, rows, first) == (3, 0, 3)
+        db.query(Coupon).filter(Coupon.code == 'BACK').update({'is_active': False})
+        
+        rows[1] = dict(rows[1], discount_value=15.0)
+        second = first + timedelta(hours=1)
+        # Updated: the edited code and the reactivated one, not the code seen unchanged
+        assert upsert_coupons(db, 1, rows, second) == (0, 2, 1)
+        updated = dict(db.query(Coupon.code, Coupon.updated_at))
+        assert updated == {'SAME': first, 'EDITED': second, 'BACK': second}, updated
+        assert {scraped_at for (scraped_at,) in db.query(Coupon.scraped_at)} == {second}
+        
+        logger.info("✅ Coupon upsert working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Coupon upsert error: {e}")
+        return False
+
+def test_coupon_write_path():
+    """Test saving scrapes: batched upserts, miss counting, deactivation, reactivation and counters"""
+    try:
+        from datetime import timedelta
+        from sqlalchemy import event, func
+        import tasks
+        from config import settings
+        from backend.models import Store, Coupon, RegionStat, ScrapeLog
+        engine, db = scratch_database()
+        db.add(Store(id=1, name='Write Store', slug='write-store', domain='write.example.com',
+                     region='europe', country='DE', store_type='retail', category='fashion'))
+        db.commit()
+        store = db.get(Store, 1)
+        
+        def scrape(codes, at):
+            coupons = [{'code': code, 'title': f"{code} deal", 'discount_value': 10.0} for code in codes]
+            return tasks.save_scraped_coupons(db, store, tasks.store_to_dict(store), coupons, at)
+        
+        def assert_counters(active):
+            rows = db.query(func.count(Coupon.id)).filter(Coupon.store_id == 1, Coupon.is_active == True).scalar()
+            stats = db.query(RegionStat.store_count, RegionStat.coupon_count).all()
+            assert rows == store.active_coupon_count == active, (rows, store.active_coupon_count, active)
+            assert stats == [(1, active)], stats
+        
+        # 1200 codes take three INSERT ... ON CONFLICT batches; a code listed twice keeps its last row
+        inserts = []
+        def count_inserts(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO coupons'):
+                inserts.append(statement)
+        codes = [f"CODE{n}" for n in range(1200)]
+        start = datetime(2024, 1, 1)
+        event.listen(engine, 'before_cursor_execute', count_inserts)
+        try:
+            coupons = [{'code': code, 'title': f"{code} deal"} for code in codes] + [{'code': 'CODE0', 'title': 'Last wins'}]
+            result = tasks.save_scraped_coupons(db, store, tasks.store_to_dict(store), coupons, start)
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_inserts)
+        assert len(inserts) == 3, len(inserts)
+        assert (result['new'], result['total']) == (1200, 1201), result
+        assert db.query(Coupon.title).filter(Coupon.code == 'CODE0').scalar() == 'Last wins'
+        assert_counters(1200)
+        
+        # Codes missing from COUPON_MISS_THRESHOLD consecutive scrapes are deactivated
+        for miss in range(1, settings.COUPON_MISS_THRESHOLD + 1):
+            result = scrape(codes[200:], start + timedelta(hours=miss))
+            missed = {count for (count,) in db.query(Coupon.missed_scrapes).filter(Coupon.code.in_(codes[:200]))}
+            assert missed == {miss}, missed
+            if miss < settings.COUPON_MISS_THRESHOLD:
+                assert result['deactivated'] == 0
+                assert_counters(1200)
+        assert result['deactivated'] == 200, result
+        assert db.query(func.max(ScrapeLog.coupons_deactivated)).scalar() == 200
+        assert_counters(1000)
+        
+        # Back on the page: reactivated with a fresh miss count
+        result = scrape(codes, start + timedelta(hours=10))
+        assert (result['new'], result['updated'], result['deactivated']) == (0, 200, 0), result
+        assert db.query(func.max(Coupon.missed_scrapes)).scalar() == 0
+        assert_counters(1200)
+        
+        logger.info("✅ Coupon write path working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Coupon write path error: {e}")
+        return False
+
+def serve_coupon_pages():
+    """A local HTTP server answering every path with one coupon; returns (server, base URL)"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = f'<div class="coupon"><span class="code">SAVE{len(self.path)}</span></div>'.encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def static_batch_database(base):
+    """Scratch database with two static stores scraping base; tasks.py sessions use it until restored"""
+    import tasks
+    from sqlalchemy.orm import sessionmaker
+    from backend.models import Store
+    engine, db = scratch_database()
+    for store_id in (1, 2):
+        db.add(Store(id=store_id, name=f"Static {store_id}", slug=f"static-{store_id}",
+                     domain=f"static{store_id}.example.com", region='asia', country='SG',
+                     scraper_config={'type': 'generic', 'coupon_list_url': f"{base}/store/{store_id}",
+                                     'selectors': {'coupon_container': '.coupon', 'code': '.code'}}))
+    db.commit()
+    tasks.SessionLocal = sessionmaker(bind=engine)
+    return db
+
+def test_static_batch():
+    """Test static batches run from a thread with a running loop and log every store when the fetch fails"""
+    try:
+        import asyncio
+        import tasks
+        from config import settings
+        from backend.models import ScrapeLog
+        
+        server, base = serve_coupon_pages()
+        session_factory, fetch_pages = tasks.SessionLocal, tasks.fetch_static_pages
+        try:
+            db = static_batch_database(base)
+            # Skip the busy-host check: the limiter is not what this tests
+            batch = ([1, 2], settings.BUSY_HOST_MAX_REQUEUES)
+            
+            async def from_running_loop():
+                return tasks.scrape_static_stores(*batch)
+            result = asyncio.run(from_running_loop())
+            assert (result['scraped'], result['failed']) == (2, 0), result
+            
+            async def broken_fetch(scrapers):
+                raise RuntimeError("connection pool unavailable")
+            tasks.fetch_static_pages = broken_fetch
+            result = tasks.scrape_static_stores(*batch)
+            assert (result['scraped'], result['failed']) == (0, 2), result
+            failures = db.query(ScrapeLog.store_id, ScrapeLog.error_message).filter(ScrapeLog.status == 'failed').all()
+            assert sorted(failures) == [(1, "connection pool unavailable"), (2, "connection pool unavailable")], failures
+        finally:
+            tasks.SessionLocal, tasks.fetch_static_pages = session_factory, fetch_pages
+            server.shutdown()
+        
+        logger.info("✅ Static batches isolated")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Static batch error: {e}")
+        return False
+
+def test_static_batch_after_browser():
+    """Test a worker that served a browser scrape can still run static batches"""
+    try:
+        import tasks
+        from config import settings
+        from browser_pool import browser_pool
+        
+        # Starting the pool leaves sync Playwright's event loop running in this thread;
+        # without a browser to launch, Playwright itself is already up
+        try:
+            with browser_pool.context():
+                pass
+        except Exception as e:
+            logger.info(f"No browser launched ({e.__class__.__name__}), Playwright is running")
+        assert browser_pool._playwright is not None
+        
+        server, base = serve_coupon_pages()
+        session_factory = tasks.SessionLocal
+        try:
+            static_batch_database(base)
+            result = tasks.scrape_static_stores([1, 2], settings.BUSY_HOST_MAX_REQUEUES)
+            assert (result['scraped'], result['failed']) == (2, 0), result
+        finally:
+            tasks.SessionLocal = session_factory
+            server.shutdown()
+            browser_pool.close()
+        
+        logger.info("✅ Static batch runs after the browser pool")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Static batch after browser error: {e}")
+        return False
+
+def test_scrape_queue():
+    """Test due stores are queued once until their scrape is logged"""
+    try:
+        from datetime import timedelta
+        from sqlalchemy.orm import sessionmaker
+        import tasks
+        from config import settings
+        from backend.models import Store
+        engine, db = scratch_database()
+        for store_id, scraper_type in ((1, 'generic'), (2, 'auto')):
+            db.add(Store(id=store_id, name=f"Queued {store_id}", slug=f"queued-{store_id}",
+                         domain=f"queued{store_id}.example.com", region='america', country='US',
+                         scraper_config={'type': scraper_type}, scrape_frequency=60))
+        db.commit()
+        
+        dispatched = []
+        session_factory = tasks.SessionLocal
+        tasks.SessionLocal = sessionmaker(bind=engine)
+        tasks.scrape_store.delay = lambda store_id: dispatched.append(store_id)
+        tasks.scrape_static_stores.delay = lambda store_ids: dispatched.extend(store_ids)
+        try:
+            assert tasks.scrape_all_stores()['queued'] == 2
+            assert sorted(dispatched) == [1, 2]
+            # Beat runs again before the scrapes are done: nothing is queued twice
+            assert tasks.scrape_all_stores()['queued'] == 0
+            
+            # A logged scrape clears the mark; a mark older than the timeout is taken as lost
+            store = db.get(Store, 1)
+            tasks.record_unchanged_scrape(db, store, datetime.utcnow())
+            assert store.scrape_queued_at is None
+            store.last_scraped_at = datetime.utcnow() - timedelta(minutes=61)
+            stale = datetime.utcnow() - timedelta(minutes=settings.SCRAPE_QUEUED_TIMEOUT_MINUTES + 1)
+            db.query(Store).filter(Store.id == 2).update({'scrape_queued_at': stale})
+            db.commit()
+            dispatched.clear()
+            assert tasks.scrape_all_stores()['queued'] == 2
+            assert sorted(dispatched) == [1, 2]
+        finally:
+            tasks.SessionLocal = session_factory
+            del tasks.scrape_store.delay
+            del tasks.scrape_static_stores.delay
+        
+        # Beat checks for due stores every MIN_SCRAPE_FREQUENCY_MINUTES, whatever the value
+        from celery_app import celery_app
+        schedule = celery_app.conf.beat_schedule['scrape-due-stores']['schedule']
+        assert schedule == timedelta(minutes=settings.MIN_SCRAPE_FREQUENCY_MINUTES)
+        
+        logger.info("✅ Scrape queue working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Scrape queue error: {e}")
+        return False
+
+def test_adaptive_frequency():
+    """Test scrape intervals follow how often a store's coupons change"""
+    try:
+        from tasks import adapted_frequency
+        
+        # Every hourly scrape over 10 hours found changes: scrape more often
+        assert adapted_frequency(60, scrapes=10, changes=10, span_minutes=600) == 30
+        assert adapted_frequency(15, scrapes=40, changes=40, span_minutes=600) == 15
+        # A week without changes: back off, at most doubling per adjustment
+        assert adapted_frequency(60, scrapes=168, changes=0, span_minutes=10080) == 120
+        assert adapted_frequency(1440, scrapes=7, changes=0, span_minutes=10080) == 1440
+        # Daily changes settle at about two scrapes per change
+        assert adapted_frequency(480, scrapes=21, changes=7, span_minutes=10080) == 630
+        # Too little history keeps the current interval
+        assert adapted_frequency(60, scrapes=2, changes=0, span_minutes=120) == 60
+        
+        # Scrapes that added, edited or deactivated coupons count as changes; empty scrapes
+        # and strategy switches (same coupons, new content hash) also log 'success'
+        import tasks
+        from datetime import timedelta
+        from sqlalchemy.orm import sessionmaker
+        from backend.models_sqlite import Store, ScrapeLog
+        engine, db = scratch_database()
+        now = datetime.utcnow()
+        # (status, found, new, updated, deactivated) per hourly scrape
+        logs = {
+            'volatile': [('success', 5, 2, 0, 0)] * 10,
+            'edited': [('success', 5, 0, 1, 0)] * 10,
+            'withdrawn': [('success', 5, 0, 0, 1)] * 10,
+            'empty': [('success', 0, 0, 0, 0)] * 10,
+            'switched': [('success', 5, 0, 0, 0), ('unchanged', 5, 0, 0, 0)] * 5,
+        }
+        for store_id, (name, statuses) in enumerate(logs.items(), start=1):
+            db.add(Store(id=store_id, name=name, slug=name, domain=f"{name}.example.com",
+                         region='america', country='US', scrape_frequency=60))
+            for hours, (status, found, new, updated, deactivated) in enumerate(statuses):
+                db.add(ScrapeLog(store_id=store_id, status=status, coupons_found=found, coupons_new=new,
+                                 coupons_updated=updated, coupons_deactivated=deactivated,
+                                 scraped_at=now - timedelta(hours=10 - hours)))
+        db.commit()
+        
+        session_factory = tasks.SessionLocal
+        tasks.SessionLocal = sessionmaker(bind=engine)
+        try:
+            tasks.adapt_scrape_frequencies()
+        finally:
+            tasks.SessionLocal = session_factory
+        frequencies = dict(db.query(Store.name, Store.scrape_frequency).all())
+        assert frequencies == {'volatile': 30, 'edited': 30, 'withdrawn': 30, 'empty': 120, 'switched': 120}, frequencies
+        
+        logger.info("✅ Adaptive scrape frequency working")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Adaptive frequency error: {e}")
+        return False
+
 def test_affiliate_utils():
     """Test affiliate URL generation"""
     try:
@@ -110,6 +780,19 @@ def main():
     tests = [
         ("Import Test", test_imports),
         ("Generic Scraper Test", test_generic_scraper),
+        ("Scrape Strategy Test", test_scrape_strategy),
+        ("HTML Parsers Test", test_html_parsers),
+        ("Normalization Test", test_normalize),
+        ("Async Fetcher Test", test_async_fetcher),
+        ("Unchanged Pages Test", test_unchanged_pages),
+        ("Host Rate Limiter Test", test_host_rate_limiter),
+        ("Politeness Scheduler Test", test_politeness_scheduler),
+        ("Coupon Upsert Test", test_coupon_upsert),
+        ("Coupon Write Path Test", test_coupon_write_path),
+        ("Static Batch Test", test_static_batch),
+        ("Static Batch After Browser Test", test_static_batch_after_browser),
+        ("Scrape Queue Test", test_scrape_queue),
+        ("Adaptive Frequency Test", test_adaptive_frequency),
         ("Affiliate Utils Test", test_affiliate_utils),
         ("Celery Config Test", test_celery_config),
     ]